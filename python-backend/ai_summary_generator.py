@@ -5,10 +5,10 @@ Now with separate Positive & Negative insight sections,
 and 75% Gemini reasoning / 25% data grounding.
 """
 
-import json
 import os
 from datetime import datetime
 from dotenv import load_dotenv
+from json_utils import read_json
 
 try:
     import google.generativeai as genai
@@ -232,8 +232,7 @@ remove all unnecessary words like here is the summary
 # ================================================================
 def test_gemini_power():
     generator = AISummaryGenerator()
-    with open('pre-process/sentiment_samsung_s24_1761241395.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = read_json('pre-process/sentiment_samsung_s24_1761241395.json')
 
     print("🔥 Testing Gemini 2.5 Flash (75% Reasoning, Split Insights)...")
     result = generator.generate_paragraph_summary(data, "Samsung S24")
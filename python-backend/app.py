@@ -7,42 +7,102 @@ Ultra-fast 4-account fetcher with relevance filtering
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from reddit_fetcher import MultiAccountRedditFetcher
+from json_utils import read_json, write_json
 from dotenv import load_dotenv
 import os
-import json
 import glob
+import logging
+import threading
 import traceback
 from datetime import datetime
 
 load_dotenv()
+# Sentiment analyzers log progress through `logging`; REVUAI_LOG=DEBUG shows per-batch detail
+logging.basicConfig(level=os.getenv("REVUAI_LOG", "INFO").upper(), format="%(message)s")
 app = Flask(__name__)
 CORS(app)
 
 # Create pre-process directory
 os.makedirs("pre-process", exist_ok=True)
 
+# Parallel comment-fetch workers (REDDIT_CONCURRENCY, default: fetcher's own)
+REDDIT_CONCURRENCY = int(os.getenv("REDDIT_CONCURRENCY", "0")) or None
+
+# Sentiment results saved by the fetch endpoint (batch analyzer runs write next to their input in pre-process/)
+SENTIMENT_OUTPUT_DIR = "pre-process_sentiments"
+
+# Gzip sentiment outputs (level 1) when COMPRESS_OUTPUT=true
+COMPRESS_OUTPUT = os.getenv("COMPRESS_OUTPUT", "false").lower() == "true"
+
+# Sentiment backend: "enhanced" (j-hartmann 5-class, default) or "basic" (Cardiff 3-class)
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "enhanced").lower()
+
 # Initialize fetcher with 4 accounts from .env
 fetcher = MultiAccountRedditFetcher()
 print(f"✅ Initialized with {len(fetcher.accounts)} Reddit account(s)")
 
 sentiment_analyzer = None
+_sentiment_lock = threading.Lock()
+
+
+def _load_sentiment_analyzer():
+    """
+    Load the configured sentiment backend once per process
+    """
+    global sentiment_analyzer
+    with _sentiment_lock:
+        if sentiment_analyzer is None:
+            if SENTIMENT_BACKEND == "basic":
+                from sentiment_analyzer import RedditSentimentAnalyzer
+                sentiment_analyzer = RedditSentimentAnalyzer()
+            else:
+                from enhanced_sentiment_analyzer import EnhancedSentimentAnalyzer
+                sentiment_analyzer = EnhancedSentimentAnalyzer()
+    return sentiment_analyzer
+
+
+def _warmup_sentiment_analyzer():
+    """
+    Background warmup so model download/load overlaps the first Reddit fetch
+    """
+    try:
+        _load_sentiment_analyzer()
+        print("✅ Sentiment model warmed up")
+    except Exception as e:
+        print(f"⚠️  Sentiment model warmup failed: {e}")
+
+
+# Skip the warmup in the debug reloader's parent process, which never serves requests
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    threading.Thread(target=_warmup_sentiment_analyzer, daemon=True).start()
+
 
 def create_sentiment_analysis_from_file(reddit_file_path, query):
     """
     Create sentiment analysis from saved Reddit JSON file
     """
     try:
-        from sentiment_analyzer import RedditSentimentAnalyzer
-        analyzer = RedditSentimentAnalyzer()
-        return analyzer.analyze_json_file(reddit_file_path)
+        return _load_sentiment_analyzer().analyze_json_file(reddit_file_path)
     except ImportError:
-        print("⚠️  sentiment_analyzer.py not found, skipping sentiment analysis")
+        print(f"⚠️  Sentiment backend '{SENTIMENT_BACKEND}' not available, skipping sentiment analysis")
         return None
     except Exception as e:
         print(f"⚠️  Sentiment analysis failed: {e}")
         return None
 
 
+def _sentiment_files(pattern):
+    """
+    Sentiment outputs whose filename matches pattern, from both SENTIMENT_OUTPUT_DIR and
+    pre-process/, including gzip-compressed (.json.gz) ones
+    """
+    files = []
+    for directory in ("pre-process", SENTIMENT_OUTPUT_DIR):
+        path_pattern = os.path.join(directory, pattern)
+        files += glob.glob(path_pattern) + glob.glob(path_pattern + ".gz")
+    return files
+
+
 @app.route("/api/reddit/fetch-mass-comments", methods=["POST"])
 def fetch_mass_comments():
     """
@@ -57,12 +117,23 @@ def fetch_mass_comments():
         query = data["query"]
         target_comments = data.get("target_comments", 2000)
         min_score = data.get("min_score", 5)
+        subreddits = data.get("subreddits")
+        if subreddits is not None:
+            if not isinstance(subreddits, list) or not all(isinstance(name, str) for name in subreddits):
+                return jsonify({"error": "subreddits must be a list of subreddit names"}), 400
+            # Accept "r/name" and "/r/name" as well as bare names
+            subreddits = [name.strip().removeprefix("/").removeprefix("r/").strip("/") for name in subreddits]
+            if not all(subreddits):
+                return jsonify({"error": "subreddits must not contain empty names"}), 400
+            subreddits = subreddits or None
         
         print(f"\n{'='*60}")
         print(f"📊 Mass Comment Fetch Request")
         print(f"   Query: {query}")
         print(f"   Target: {target_comments:,} comments")
         print(f"   Min Score: {min_score}")
+        if subreddits:
+            print(f"   Subreddits: {', '.join(subreddits)}")
         print(f"   Accounts: {len(fetcher.accounts)}")
         print(f"{'='*60}\n")
         
@@ -75,39 +146,37 @@ def fetch_mass_comments():
             query=query,
             target_comments=target_comments,
             min_score=min_score,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            concurrency=REDDIT_CONCURRENCY,
+            subreddits=subreddits
         )
         
         # Automatically run enhanced sentiment analysis on the fetched data
         print(f"\n🎭 Running automatic enhanced sentiment analysis...")
         try:
-            from enhanced_sentiment_analyzer import EnhancedSentimentAnalyzer
-            
             # Create temporary file path for the fetched data
             timestamp = int(datetime.now().timestamp())
             temp_reddit_file = f"pre-process/reddit_{query.replace(' ', '_')}_{timestamp}.json"
             
             # Save the Reddit data temporarily
-            with open(temp_reddit_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            write_json(temp_reddit_file, result, stream_key='comments')
             
-            # Run enhanced sentiment analysis
-            analyzer = EnhancedSentimentAnalyzer()
-            sentiment_result = analyzer.analyze_json_file(temp_reddit_file)
+            # Run sentiment analysis (waits for the warmup if it is still loading)
+            sentiment_result = create_sentiment_analysis_from_file(temp_reddit_file, query)
             
             if sentiment_result:
     # 🆕 Ensure separate directory for sentiment outputs
-                sentiment_dir = "pre-process_sentiments"
+                sentiment_dir = SENTIMENT_OUTPUT_DIR
                 os.makedirs(sentiment_dir, exist_ok=True)
 
     # Save enhanced sentiment analysis in new folder
                 sentiment_file = os.path.join(
                     sentiment_dir, 
                     f"enhanced_sentiment_{query.replace(' ', '_')}_{timestamp}.json"
+                    + (".gz" if COMPRESS_OUTPUT else "")
                 )
 
-                with open(sentiment_file, 'w', encoding='utf-8') as f:
-                    json.dump(sentiment_result, f, indent=2, ensure_ascii=False)
+                write_json(sentiment_file, sentiment_result, stream_key='all_comments')
 
                 print(f"✅ Enhanced sentiment analysis saved to: {sentiment_file}")
 
@@ -115,7 +184,7 @@ def fetch_mass_comments():
                 # Add comprehensive sentiment analysis to the result
                 result['sentiment_analysis'] = {
                     'file': sentiment_file,
-                    'summary': sentiment_result['sentiment_breakdown_5class'],
+                    'summary': sentiment_result.get('sentiment_breakdown_5class', sentiment_result.get('sentiment_breakdown')),
                     'overall_sentiment': sentiment_result['overall_sentiment'],
                     'dominant_emotion': sentiment_result.get('emotion_breakdown', {}),
                     'confidence_breakdown': sentiment_result.get('confidence_breakdown', {}),
@@ -135,8 +204,7 @@ def fetch_mass_comments():
         timestamp = int(datetime.now().timestamp())
         reddit_file = f"pre-process/reddit_{query.replace(' ', '_')}_{timestamp}.json"
         
-        with open(reddit_file, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_json(reddit_file, result, stream_key='comments')
         
         print(f"\n✅ Saved Reddit data: {reddit_file}")
         print(f"   Comments: {result['metadata']['totalComments']:,}")
@@ -160,18 +228,17 @@ def get_latest_sentiment():
     """
     try:
         # Prioritize enhanced sentiment files
-        enhanced_files = glob.glob("pre-process/enhanced_sentiment_*.json")
+        enhanced_files = _sentiment_files("enhanced_sentiment_*.json")
         if enhanced_files:
             latest_file = max(enhanced_files, key=os.path.getctime)
         else:
             # Fallback to regular sentiment files
-            files = glob.glob("pre-process/sentiment_*.json")
+            files = _sentiment_files("sentiment_*.json")
             if not files:
                 return jsonify({"error": "No sentiment files found"}), 404
             latest_file = max(files, key=os.path.getctime)
         
-        with open(latest_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_json(latest_file)
         
         return jsonify(data)
     
@@ -193,8 +260,7 @@ def get_latest_reddit():
         
         latest_file = max(files, key=os.path.getctime)
         
-        with open(latest_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = read_json(latest_file)
         
         return jsonify(data)
     
@@ -210,7 +276,7 @@ def list_files():
     """
     try:
         reddit_files = glob.glob("pre-process/reddit_*.json")
-        sentiment_files = glob.glob("pre-process/sentiment_*.json")
+        sentiment_files = _sentiment_files("enhanced_sentiment_*.json") + _sentiment_files("sentiment_*.json")
         
         files = {
             "reddit": [
@@ -250,7 +316,8 @@ def health_check():
         "features": {
             "multi_account": True,
             "relevance_filtering": True,
-            "sentiment_analysis": sentiment_analyzer is not None
+            "sentiment_analysis": sentiment_analyzer is not None,
+            "sentiment_backend": SENTIMENT_BACKEND
         }
     })
 
@@ -5,47 +5,241 @@ Provides detailed sentiment classification: very negative, negative, neutral, po
 Uses emotion detection to determine sentiment with high accuracy
 """
 
-import json
+import logging
 import os
 from datetime import datetime
-from transformers import pipeline
+from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+import numpy as np
 import torch
 import warnings
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from json_utils import read_json, write_json
 warnings.filterwarnings("ignore")
 
+logger = logging.getLogger(__name__)
+
 # GPU Detection
 def get_best_device():
     if torch.cuda.is_available():
-        print("✅ Using NVIDIA GPU (CUDA)")
+        logger.info("✅ Using NVIDIA GPU (CUDA)")
         return 0, "NVIDIA CUDA"
     elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-        print("✅ Using Apple GPU (MPS)")
+        logger.info("✅ Using Apple GPU (MPS)")
         return "mps", "Apple MPS"
     else:
-        print("⚙️ Using CPU")
+        logger.info("⚙️ Using CPU")
         return -1, "CPU"
 
 DEVICE, DEVICE_NAME = get_best_device()
-MAX_BATCH_SIZE = 16
-TRUNCATE_LENGTH = 512
+TORCH_DEVICE = torch.device("cuda:0" if DEVICE == 0 else "mps" if DEVICE == "mps" else "cpu")
+# Half precision on GPU halves activation memory, so GPU batches can be larger
+HALF_PRECISION = DEVICE in (0, "mps")
+MAX_BATCH_SIZE = 64 if HALF_PRECISION else 16
+TRUNCATE_LENGTH = 512      # Max tokens per comment; the tokenizer truncates
+STORED_TEXT_LENGTH = 512   # Characters of comment text kept in the output
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+# ONNX Runtime backend (SENTIMENT_USE_ONNX=true, needs `optimum[onnxruntime]`)
+USE_ONNX = os.getenv("SENTIMENT_USE_ONNX", "false").lower() == "true"
+ONNX_CACHE_DIR = "onnx-models"  # Exported model is cached here so the export runs once
+
+# Compile the PyTorch model at startup (SENTIMENT_COMPILE=true, CUDA only)
+COMPILE_MODEL = os.getenv("SENTIMENT_COMPILE", "false").lower() == "true"
+
+SENTIMENT_CLASSES = ('very_positive', 'positive', 'neutral', 'negative', 'very_negative')
+NEUTRAL_CODE = SENTIMENT_CLASSES.index('neutral')
+CONFIDENCE_THRESHOLDS = (0.0, 0.5, 0.7)  # Lower edge of each confidence bucket used by the mapping
+CONFIDENCE_BIN_LABELS = [f"{i / 10:.1f}-{(i + 1) / 10:.1f}" for i in range(10)]  # '0.0-0.1' ... '0.9-1.0'
+TOP_COMMENTS_PER_CATEGORY = 5
+
+SUMMARY_SAMPLE_PER_BUCKET = 5   # Comments per sentiment bucket sent to Gemini
+SUMMARY_SNIPPET_LENGTH = 200    # Characters of each comment included in the prompt
 
 class EnhancedSentimentAnalyzer:
     def __init__(self):
         """Initialize with j-hartmann emotion model for sentiment analysis"""
-        print("🤖 Loading Enhanced Sentiment Analysis Model...")
-        print(f"🔧 Device: {DEVICE_NAME}")
-        print(f"📦 Batch size: {MAX_BATCH_SIZE}")
+        logger.info("🤖 Loading Enhanced Sentiment Analysis Model...")
+        logger.info(f"🔧 Device: {DEVICE_NAME}")
+        logger.info(f"📦 Batch size: {MAX_BATCH_SIZE}")
+        logger.info(f"🎯 Precision: {'FP16' if HALF_PRECISION else 'FP32'}")
         
         # j-hartmann emotion model for sentiment analysis
+        self.model, self.tokenizer = self._load_emotion_model()
+        self.is_onnx = not isinstance(self.model, torch.nn.Module)
+        
+        if self.is_onnx:
+            # ORT models take CPU tensors; the execution provider handles placement
+            self.device = torch.device("cpu")
+        else:
+            # Inference only: switch off dropout and autograd tracking once
+            self.device = TORCH_DEVICE
+            self.model.to(self.device).eval()
+            self.model.requires_grad_(False)
+            if HALF_PRECISION:
+                self.model.half()
+        self.id2label = self.model.config.id2label
+        self.label2id = {label: label_id for label_id, label in self.id2label.items()}
+        self.sentiment_table = self._build_sentiment_table()
+        self.forward_model = self._compile_model() if COMPILE_MODEL and not self.is_onnx and DEVICE == 0 else self.model
+        
+        # Pipeline kept as a fallback for the direct batched forward
         self.emotion_analyzer = pipeline(
             "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            device=DEVICE,
+            model=self.model,
+            tokenizer=self.tokenizer,
+            # ONNX Runtime places the model through its execution provider
+            device=None if self.is_onnx else DEVICE,
             batch_size=MAX_BATCH_SIZE
         )
         
-        print("✅ Model loaded successfully!")
+        # Gemini summary client, created on first use and shared across files
+        self._ai_generator = None
+        self._ai_generator_error = None
+        
+        logger.info(f"✅ Model loaded successfully! ({'ONNX Runtime' if self.is_onnx else 'PyTorch'})")
+
+    def _load_emotion_model(self):
+        """Load the emotion model (ONNX Runtime when enabled, else PyTorch) and its tokenizer"""
+        # Rust (tokenizers) implementation; the Python tokenizer is far slower on batches
+        tokenizer = AutoTokenizer.from_pretrained(EMOTION_MODEL, use_fast=True)
+        if not tokenizer.is_fast:
+            logger.warning("⚠️ Fast tokenizer not available, using the slow Python tokenizer")
+        
+        if USE_ONNX:
+            try:
+                return self._load_onnx_model(), tokenizer
+            except Exception as e:
+                logger.warning(f"⚠️ ONNX Runtime backend not available, falling back to PyTorch: {e}")
+        
+        return AutoModelForSequenceClassification.from_pretrained(EMOTION_MODEL), tokenizer
+
+    def _load_onnx_model(self):
+        """Export the emotion model to ONNX on first run, then load the cached export"""
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        
+        available = ort.get_available_providers()
+        if DEVICE == 0 and "CUDAExecutionProvider" in available:
+            provider = "CUDAExecutionProvider"
+        elif "DmlExecutionProvider" in available:
+            provider = "DmlExecutionProvider"
+        else:
+            provider = "CPUExecutionProvider"
+        logger.info(f"⚡ ONNX Runtime provider: {provider}")
+        
+        export_dir = os.path.join(ONNX_CACHE_DIR, EMOTION_MODEL.replace('/', '__'))
+        if os.path.isdir(export_dir):
+            return ORTModelForSequenceClassification.from_pretrained(export_dir, provider=provider)
+        
+        logger.info("📦 Exporting emotion model to ONNX (first run only)...")
+        model = ORTModelForSequenceClassification.from_pretrained(EMOTION_MODEL, export=True, provider=provider)
+        model.save_pretrained(export_dir)
+        return model
+
+    def _compile_model(self):
+        """
+        Compile the model once (Torch-TensorRT backend if installed, else inductor)
+        and warm it up so the first real batch doesn't pay the compile cost
+        """
+        try:
+            try:
+                import torch_tensorrt  # noqa: F401 - registers the "torch_tensorrt" backend
+                backend = "torch_tensorrt"
+            except ImportError:
+                backend = "inductor"
+            logger.info(f"⚙️ Compiling emotion model (backend: {backend})...")
+            # dynamic=True: length-bucketed batches have varying sequence lengths
+            compiled = torch.compile(self.model, backend=backend, dynamic=True)
+            warmup = self.tokenizer(["warming up the emotion model"] * 2, return_tensors="pt").to(self.device)
+            with torch.inference_mode():
+                compiled(**warmup)
+            logger.info("✅ Model compiled")
+            return compiled
+        except Exception as e:
+            logger.warning(f"⚠️ Model compilation failed, using eager mode: {e}")
+            return self.model
+
+    def _encode_batch(self, batch_texts):
+        """Tokenize one batch; on CUDA the tensors are pinned so the host-to-device copy can be async"""
+        encoded = self.tokenizer(
+            batch_texts,
+            padding=True,
+            truncation=True,
+            max_length=TRUNCATE_LENGTH,
+            return_tensors="pt"
+        )
+        if self.device.type == "cuda":
+            return {name: tensor.pin_memory() for name, tensor in encoded.items()}
+        return dict(encoded)
+
+    def _classify_emotions(self, texts):
+        """
+        Batch-tokenize and run the emotion model directly, MAX_BATCH_SIZE texts per forward.
+        Returns (label_ids, scores) NumPy arrays in input order.
+        """
+        # Batch similar lengths together so each batch pads to a short maximum
+        lengths = [len(text) for text in texts]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        batches = [order[start:start + MAX_BATCH_SIZE] for start in range(0, len(order), MAX_BATCH_SIZE)]
+        non_blocking = self.device.type == "cuda"
+        # Per-batch results stay on the device; copying them back once at the end avoids
+        # a host sync after every forward, so the device can queue the next batch immediately
+        batch_label_ids, batch_scores = [], []
+        
+        # The next batch is tokenized on a worker thread (the Rust tokenizer releases the GIL)
+        # while the current batch runs on the device
+        with torch.inference_mode(), ThreadPoolExecutor(max_workers=1) as tokenize_pool:
+            next_encoded = tokenize_pool.submit(self._encode_batch, [texts[i] for i in batches[0]]) if batches else None
+            for n, batch_order in enumerate(batches):
+                encoded = next_encoded.result()
+                if n + 1 < len(batches):
+                    next_encoded = tokenize_pool.submit(self._encode_batch, [texts[i] for i in batches[n + 1]])
+                
+                encoded = {name: tensor.to(self.device, non_blocking=non_blocking) for name, tensor in encoded.items()}
+                probs = self.forward_model(**encoded).logits.float().softmax(-1)
+                top_scores, top_label_ids = probs.max(-1)
+                batch_scores.append(top_scores)
+                batch_label_ids.append(top_label_ids)
+            
+            label_ids = np.empty(len(texts), dtype=np.int64)
+            scores = np.empty(len(texts), dtype=np.float32)
+            if batches:
+                # Batches are consecutive slices of `order`, so the concatenation is in `order` order
+                order = np.asarray(order)
+                label_ids[order] = torch.cat(batch_label_ids).cpu().numpy()
+                scores[order] = torch.cat(batch_scores).cpu().numpy()
+        return label_ids, scores
+
+    def _classify_emotions_pipeline(self, texts):
+        """Fallback: classify through the HF pipeline, returning the same arrays as _classify_emotions"""
+        with torch.inference_mode():
+            results = self.emotion_analyzer(texts, truncation=True, max_length=TRUNCATE_LENGTH)
+        label_ids = np.fromiter((self.label2id[r['label']] for r in results), dtype=np.int64, count=len(results))
+        scores = np.fromiter((r['score'] for r in results), dtype=np.float32, count=len(results))
+        return label_ids, scores
+
+    def _build_sentiment_table(self):
+        """
+        Precompute the sentiment code for every (emotion label, confidence bucket) pair
+        from _emotion_to_sentiment, so classification becomes a single array lookup
+        """
+        table = np.empty((len(self.id2label), len(CONFIDENCE_THRESHOLDS)), dtype=np.int8)
+        for label_id, label in self.id2label.items():
+            for bucket, threshold in enumerate(CONFIDENCE_THRESHOLDS):
+                sentiment, _ = self._emotion_to_sentiment(label, threshold)
+                table[label_id, bucket] = SENTIMENT_CLASSES.index(sentiment)
+        return table
+
+    def _emotions_to_sentiments(self, label_ids, scores):
+        """
+        Vectorized _emotion_to_sentiment over whole arrays.
+        Returns (sentiment_codes, confidences); neutral comments get confidence 0.0.
+        """
+        buckets = np.searchsorted(CONFIDENCE_THRESHOLDS, scores, side='right') - 1
+        sentiment_codes = self.sentiment_table[label_ids, buckets]
+        confidences = np.where(sentiment_codes == NEUTRAL_CODE, np.float32(0.0), scores)
+        return sentiment_codes, confidences
 
     def _emotion_to_sentiment(self, emotion, confidence):
         """
@@ -75,151 +269,196 @@ class EnhancedSentimentAnalyzer:
 
 
 
-    def analyze_comments_batch(self, comments_data):
-        """Analyze comments with detailed sentiment classification"""
-        print(f"🚀 Starting enhanced sentiment analysis...")
+    def _get_ai_generator(self):
+        """Return the shared AISummaryGenerator, constructing it once; re-raise a failed setup"""
+        if self._ai_generator is None:
+            if self._ai_generator_error is not None:
+                raise self._ai_generator_error
+            try:
+                from ai_summary_generator import AISummaryGenerator
+                self._ai_generator = AISummaryGenerator()
+            except Exception as e:
+                self._ai_generator_error = e
+                raise
+        return self._ai_generator
+
+    def _summary_sample(self, comments):
+        """
+        Build a small, truncated comment sample for the AI summary prompt
+        so LLM context stays bounded regardless of how many comments were analyzed
+        """
+        return [
+            {
+                'text': c['text'][:SUMMARY_SNIPPET_LENGTH],
+                'score': c['score'],
+                'confidence': c['confidence']
+            }
+            for c in comments[:SUMMARY_SAMPLE_PER_BUCKET]
+        ]
+
+    def _analyze_columns(self, comments_data, posts=None):
+        """
+        Classify comments and return the results as parallel columns
+        (metadata, texts, emotion label ids, emotion scores, sentiment codes, confidences),
+        or None when nothing could be analyzed.
+        `posts` maps post_id -> title for comments that reference their post by id.
+        """
+        posts = posts or {}
+        logger.debug(f"🚀 Starting enhanced sentiment analysis...")
         
         texts, metadata = [], []
         for i, comment in enumerate(comments_data):
             text = comment.get('text', comment.get('body', '')) if isinstance(comment, dict) else str(comment)
             score = comment.get('score', 0) if isinstance(comment, dict) else 0
-            post_title = comment.get('post_title', '') if isinstance(comment, dict) else ''
+            # Fetcher output references posts by post_id; older files carry post_title inline
+            post_title = (comment.get('post_title') or posts.get(comment.get('post_id'), '')) if isinstance(comment, dict) else ''
             comment_id = comment.get('id', f'comment_{i}') if isinstance(comment, dict) else f'comment_{i}'
             
-            if text and len(text.strip()) >= 10:
-                texts.append(text[:TRUNCATE_LENGTH])
-                metadata.append({
-                    'id': comment_id,
-                    'original_text': text,
-                    'reddit_score': score,
-                    'post_title': post_title
-                })
+            # Cheap length test rejects short texts before strip() copies them
+            if text and len(text) >= 10 and len(text.strip()) >= 10:
+                texts.append(text)
+                metadata.append((comment_id, score, post_title))
         
         if not texts:
-            print("⚠️ No valid texts to analyze")
-            return []
+            logger.warning("⚠️ No valid texts to analyze")
+            return None
+        
+        # Classify each distinct text once (crossposts / bot replies repeat a lot)
+        unique_index = {}
+        text_slots = [unique_index.setdefault(text, len(unique_index)) for text in texts]
+        unique_texts = list(unique_index)
         
-        print(f"📊 Processing {len(texts)} comments...")
-        analyzed_comments = []
+        logger.debug(f"📊 Processing {len(texts)} comments ({len(unique_texts)} unique)...")
         
         try:
             # Run emotion analysis with j-hartmann model
-            print("😊 Running emotion analysis (j-hartmann)...")
-            emotion_results = self.emotion_analyzer(texts)
+            logger.debug("😊 Running emotion analysis (j-hartmann)...")
+            try:
+                unique_label_ids, unique_scores = self._classify_emotions(unique_texts)
+            except Exception as e:
+                logger.warning(f"⚠️ Batched forward failed, falling back to pipeline: {e}")
+                unique_label_ids, unique_scores = self._classify_emotions_pipeline(unique_texts)
             
-            for i, (emotion_result, meta) in enumerate(zip(emotion_results, metadata)):
-                # Classification from emotion model
-                emotion_sentiment, emotion_confidence = self._emotion_to_sentiment(
-                    emotion_result['label'], 
-                    emotion_result['score']
-                )
-                
-                # Use emotion model result directly
-                final_sentiment = emotion_sentiment
-                final_confidence = abs(emotion_confidence)
-                
-                result = {
-                    'id': meta['id'],
-                    'text': texts[i],
-                    'score': meta['reddit_score'],
-                    'post_title': meta['post_title'],
-                    'sentiment': final_sentiment,
-                    'confidence': round(final_confidence, 4),
-                    'emotion': {
-                        'primary': emotion_result['label'],
-                        'confidence': round(emotion_result['score'], 4)
-                    }
-                }
-                
-                analyzed_comments.append(result)
+            # Broadcast unique results back to every comment, then map emotions -> sentiment in one go
+            slots = np.asarray(text_slots)
+            label_ids = unique_label_ids[slots]
+            scores = unique_scores[slots]
+            sentiment_codes, confidences = self._emotions_to_sentiments(label_ids, scores)
             
-            print(f"✅ Enhanced analysis complete! Processed {len(analyzed_comments)} comments")
-            return analyzed_comments
+            logger.debug(f"✅ Enhanced analysis complete! Processed {len(texts)} comments")
+            return metadata, texts, label_ids, scores, sentiment_codes, confidences
             
         except Exception as e:
             import traceback
-            print(f"🚨 Error in enhanced analysis: {str(e)}")
-            print(traceback.format_exc())
-            return []
+            logger.error(f"🚨 Error in enhanced analysis: {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
+
+    def _comment_records(self, columns, indices=None):
+        """Materialize per-comment result dicts from the columns (every row, or only ``indices``)"""
+        metadata, texts, label_ids, scores, sentiment_codes, confidences = columns
+        if indices is not None:
+            picked = np.asarray(indices, dtype=np.intp)
+            metadata = [metadata[i] for i in picked.tolist()]
+            texts = [texts[i] for i in picked.tolist()]
+            label_ids, scores = label_ids[picked], scores[picked]
+            sentiment_codes, confidences = sentiment_codes[picked], confidences[picked]
+        
+        rows = zip(metadata, texts, label_ids.tolist(), scores.tolist(), sentiment_codes.tolist(), confidences.tolist())
+        return [
+            {
+                'id': comment_id,
+                'text': text[:STORED_TEXT_LENGTH],
+                'score': score,
+                'post_title': post_title,
+                'sentiment': SENTIMENT_CLASSES[code],
+                'confidence': round(confidence, 4),
+                'emotion': {
+                    'primary': self.id2label[label_id],
+                    'confidence': round(emotion_score, 4)
+                }
+            }
+            for (comment_id, score, post_title), text, label_id, emotion_score, code, confidence in rows
+        ]
+
+    @staticmethod
+    def _top_indices(sentiment_codes, confidences, sentiment, k=TOP_COMMENTS_PER_CATEGORY):
+        """Row indices of the k most confident comments with the given sentiment (earlier rows win ties)"""
+        candidates = np.flatnonzero(sentiment_codes == SENTIMENT_CLASSES.index(sentiment))
+        return candidates[np.argsort(-confidences[candidates], kind='stable')[:k]]
 
-    def analyze_json_file(self, file_path):
-        """Analyze all comments in a JSON file with enhanced sentiment"""
-        print(f"\n{'='*60}")
-        print(f"📊 Enhanced Analysis: {os.path.basename(file_path)}")
-        print(f"{'='*60}")
+    def analyze_comments_batch(self, comments_data, posts=None):
+        """Analyze comments with detailed sentiment classification"""
+        columns = self._analyze_columns(comments_data, posts)
+        return self._comment_records(columns) if columns is not None else []
+
+    def analyze_json_file(self, file_path, data=None):
+        """Analyze all comments in a JSON file with enhanced sentiment.
+
+        ``data`` may be passed when the file has already been loaded (e.g. prefetched).
+        """
+        logger.info(f"\n{'='*60}")
+        logger.info(f"📊 Enhanced Analysis: {os.path.basename(file_path)}")
+        logger.info(f"{'='*60}")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if data is None:
+                data = read_json(file_path)
             
             if 'comments' in data:
                 comments = data['comments']
             else:
-                print("❌ No 'comments' key found in JSON")
+                logger.error("❌ No 'comments' key found in JSON")
                 return None
                 
-            print(f"📝 Found {len(comments)} total comments")
+            logger.info(f"📝 Found {len(comments)} total comments")
             if not comments:
-                print("⚠️ No comments to analyze")
+                logger.warning("⚠️ No comments to analyze")
                 return None
             
-            analyzed_comments = self.analyze_comments_batch(comments)
-            if not analyzed_comments:
-                print("❌ No comments were successfully analyzed")
+            columns = self._analyze_columns(comments, data.get('posts'))
+            if columns is None:
+                logger.error("❌ No comments were successfully analyzed")
                 return None
             
-            # Calculate detailed statistics
-            total_analyzed = len(analyzed_comments)
-            sentiment_counts = Counter(c['sentiment'] for c in analyzed_comments)
-            emotion_counts = Counter(c['emotion']['primary'] for c in analyzed_comments)
+            # Statistics are reduced column-wise; dicts are only built for the output
+            _, _, label_ids, emotion_scores, sentiment_codes, confidences = columns
+            total_analyzed = len(sentiment_codes)
             
-            # 5-class sentiment breakdown
-            sentiment_percentages = {
-                'very_positive': (sentiment_counts.get('very_positive', 0) / total_analyzed) * 100,
-                'positive': (sentiment_counts.get('positive', 0) / total_analyzed) * 100,
-                'neutral': (sentiment_counts.get('neutral', 0) / total_analyzed) * 100,
-                'negative': (sentiment_counts.get('negative', 0) / total_analyzed) * 100,
-                'very_negative': (sentiment_counts.get('very_negative', 0) / total_analyzed) * 100
+            class_counts = np.bincount(sentiment_codes, minlength=len(SENTIMENT_CLASSES)).tolist()
+            sentiment_counts = Counter({k: n for k, n in zip(SENTIMENT_CLASSES, class_counts) if n})
+            emotion_counts = {
+                self.id2label[label_id]: n
+                for label_id, n in enumerate(np.bincount(label_ids, minlength=len(self.id2label)).tolist()) if n
             }
+            # Confidence breakdown (10 bins from 0.0-1.0) uses the reported (rounded) emotion confidence
+            confidence_bin_ids = np.minimum((np.round(emotion_scores.astype(np.float64), 4) * 10).astype(np.intp), 9)
+            confidence_counts = np.bincount(confidence_bin_ids, minlength=len(CONFIDENCE_BIN_LABELS)).tolist()
             
-            emotion_percentages = {k: (v/total_analyzed)*100 for k, v in emotion_counts.items()}
-            
-            # Confidence breakdown (10 bins from 0.0-1.0) - Using Emotion Confidence
-            confidence_bins = {
-                '0.0-0.1': 0, '0.1-0.2': 0, '0.2-0.3': 0, '0.3-0.4': 0, '0.4-0.5': 0,
-                '0.5-0.6': 0, '0.6-0.7': 0, '0.7-0.8': 0, '0.8-0.9': 0, '0.9-1.0': 0
-            }
+            # 5-class sentiment breakdown; overall sentiment picked from raw counts
+            # (ties resolve in SENTIMENT_CLASSES order, most positive first)
+            pct_scale = 100.0 / total_analyzed
+            sentiment_percentages = {k: sentiment_counts[k] * pct_scale for k in SENTIMENT_CLASSES}
+            dominant_sentiment = max(SENTIMENT_CLASSES, key=sentiment_counts.__getitem__)
             
-            for comment in analyzed_comments:
-                # Use emotion confidence for the confidence breakdown
-                emotion_confidence = comment['emotion']['confidence']
-                bin_index = min(int(emotion_confidence * 10), 9)  # Ensure max index is 9
-                bin_keys = list(confidence_bins.keys())
-                confidence_bins[bin_keys[bin_index]] += 1
+            emotion_percentages = {k: v * pct_scale for k, v in emotion_counts.items()}
             
-            # Convert confidence counts to percentages
-            confidence_percentages = {k: (v/total_analyzed)*100 for k, v in confidence_bins.items()}
+            confidence_bins = dict(zip(CONFIDENCE_BIN_LABELS, confidence_counts))
+            confidence_percentages = {k: v * pct_scale for k, v in confidence_bins.items()}
             
-            # Get top comments by category
-            top_very_positive = sorted(
-                [c for c in analyzed_comments if c['sentiment'] == 'very_positive'], 
-                key=lambda x: x['confidence'], reverse=True
-            )[:5]
-            
-            top_very_negative = sorted(
-                [c for c in analyzed_comments if c['sentiment'] == 'very_negative'], 
-                key=lambda x: x['confidence'], reverse=True
-            )[:5]
-            
-            # Determine overall sentiment
-            dominant_sentiment = max(sentiment_percentages, key=sentiment_percentages.get)
+            # Top comments by category, highest confidence first
+            top_very_positive = self._comment_records(
+                columns, self._top_indices(sentiment_codes, confidences, 'very_positive'))
+            top_very_negative = self._comment_records(
+                columns, self._top_indices(sentiment_codes, confidences, 'very_negative'))
+            analyzed_comments = self._comment_records(columns)
             
             analysis_result = {
                 'filename': os.path.basename(file_path),
                 'analyzed_at': datetime.now().isoformat(),
                 'query': data.get('metadata', {}).get('query', 'unknown'),
                 'total_comments_analyzed': total_analyzed,
-                'model_used': 'j-hartmann/emotion-english-distilroberta-base',
+                'model_used': EMOTION_MODEL,
                 'sentiment_breakdown_5class': sentiment_percentages,
                 'emotion_breakdown': emotion_percentages,
                 'confidence_breakdown': confidence_percentages,
@@ -240,10 +479,9 @@ class EnhancedSentimentAnalyzer:
             }
             
             # Generate AI summary using Gemini
-            print(f"🤖 Generating AI summary with Gemini...")
+            logger.info(f"🤖 Generating AI summary with Gemini...")
             try:
-                from ai_summary_generator import AISummaryGenerator
-                ai_generator = AISummaryGenerator()
+                ai_generator = self._get_ai_generator()
                 
                 # Prepare data for AI summary (convert to expected format)
                 summary_data = {
@@ -258,17 +496,17 @@ class EnhancedSentimentAnalyzer:
                         'raw_counts': dict(sentiment_counts)
                     },
                     'summary': {
-                        'top_positive_comments': top_very_positive,
-                        'top_negative_comments': top_very_negative
+                        'top_positive_comments': self._summary_sample(top_very_positive),
+                        'top_negative_comments': self._summary_sample(top_very_negative)
                     }
                 }
                 
                 ai_summary = ai_generator.generate_paragraph_summary(summary_data, analysis_result['query'])
                 analysis_result['ai_summary'] = ai_summary
-                print(f"✅ AI summary generated successfully!")
+                logger.info(f"✅ AI summary generated successfully!")
                 
             except Exception as e:
-                print(f"⚠️ AI summary generation failed: {e}")
+                logger.warning(f"⚠️ AI summary generation failed: {e}")
                 analysis_result['ai_summary'] = {
                     'paragraph_summary': f"Analysis of {total_analyzed} comments about '{analysis_result['query']}' shows {dominant_sentiment.replace('_', ' ')} sentiment overall.",
                     'generated_at': datetime.now().isoformat(),
@@ -277,85 +515,134 @@ class EnhancedSentimentAnalyzer:
                 }
             
             # Print detailed summary
-            print(f"\n{'='*60}")
-            print(f"✅ Enhanced Analysis Complete!")
-            print(f"{'='*60}")
-            print(f"📊 Comments analyzed: {total_analyzed}")
-            print(f"🎭 Overall sentiment: {dominant_sentiment.upper().replace('_', ' ')} ({sentiment_percentages[dominant_sentiment]:.1f}%)")
-            print(f"\n📈 Detailed Breakdown:")
-            print(f"   Very Positive: {sentiment_counts.get('very_positive', 0):,} ({sentiment_percentages['very_positive']:.1f}%)")
-            print(f"   Positive:      {sentiment_counts.get('positive', 0):,} ({sentiment_percentages['positive']:.1f}%)")
-            print(f"   Neutral:       {sentiment_counts.get('neutral', 0):,} ({sentiment_percentages['neutral']:.1f}%)")
-            print(f"   Negative:      {sentiment_counts.get('negative', 0):,} ({sentiment_percentages['negative']:.1f}%)")
-            print(f"   Very Negative: {sentiment_counts.get('very_negative', 0):,} ({sentiment_percentages['very_negative']:.1f}%)")
+            logger.info(f"\n{'='*60}")
+            logger.info(f"✅ Enhanced Analysis Complete!")
+            logger.info(f"{'='*60}")
+            logger.info(f"📊 Comments analyzed: {total_analyzed}")
+            logger.info(f"🎭 Overall sentiment: {dominant_sentiment.upper().replace('_', ' ')} ({sentiment_percentages[dominant_sentiment]:.1f}%)")
+            logger.info(f"\n📈 Detailed Breakdown:")
+            logger.info(f"   Very Positive: {sentiment_counts.get('very_positive', 0):,} ({sentiment_percentages['very_positive']:.1f}%)")
+            logger.info(f"   Positive:      {sentiment_counts.get('positive', 0):,} ({sentiment_percentages['positive']:.1f}%)")
+            logger.info(f"   Neutral:       {sentiment_counts.get('neutral', 0):,} ({sentiment_percentages['neutral']:.1f}%)")
+            logger.info(f"   Negative:      {sentiment_counts.get('negative', 0):,} ({sentiment_percentages['negative']:.1f}%)")
+            logger.info(f"   Very Negative: {sentiment_counts.get('very_negative', 0):,} ({sentiment_percentages['very_negative']:.1f}%)")
             
             dominant_emotion = max(emotion_percentages, key=emotion_percentages.get)
-            print(f"\n😊 Dominant emotion: {dominant_emotion} ({emotion_percentages[dominant_emotion]:.1f}%)")
+            logger.info(f"\n😊 Dominant emotion: {dominant_emotion} ({emotion_percentages[dominant_emotion]:.1f}%)")
             
             # Show emotion confidence distribution summary
             high_confidence = confidence_percentages.get('0.8-0.9', 0) + confidence_percentages.get('0.9-1.0', 0)
             medium_confidence = confidence_percentages.get('0.6-0.7', 0) + confidence_percentages.get('0.7-0.8', 0)
             low_confidence = sum(confidence_percentages.get(k, 0) for k in ['0.0-0.1', '0.1-0.2', '0.2-0.3', '0.3-0.4', '0.4-0.5', '0.5-0.6'])
             
-            print(f"\n📊 Emotion Confidence Distribution:")
-            print(f"   High (0.8-1.0):   {high_confidence:.1f}%")
-            print(f"   Medium (0.6-0.8): {medium_confidence:.1f}%") 
-            print(f"   Low (0.0-0.6):    {low_confidence:.1f}%")
-            print(f"{'='*60}\n")
+            logger.info(f"\n📊 Emotion Confidence Distribution:")
+            logger.info(f"   High (0.8-1.0):   {high_confidence:.1f}%")
+            logger.info(f"   Medium (0.6-0.8): {medium_confidence:.1f}%")
+            logger.info(f"   Low (0.0-0.6):    {low_confidence:.1f}%")
+            logger.info(f"{'='*60}\n")
             
             return analysis_result
             
         except Exception as e:
             import traceback
-            print(f"\n🚨 FATAL ERROR:")
-            print(f"{'='*60}")
-            print(traceback.format_exc())
-            print(f"{'='*60}\n")
+            logger.error(f"\n🚨 FATAL ERROR:")
+            logger.info(f"{'='*60}")
+            logger.error(traceback.format_exc())
+            logger.info(f"{'='*60}\n")
             return None
 
-    def analyze_all_files(self, directory_path="pre-process"):
-        """Analyze all JSON files in the directory"""
-        print(f"\n{'='*60}")
-        print(f"🔍 Enhanced Sentiment Analysis - Scanning: {directory_path}")
-        print(f"{'='*60}\n")
+    def analyze_all_files(self, directory_path="pre-process", force=False):
+        """Analyze all JSON files in the directory.
+
+        Files whose enhanced_sentiment_ output is newer than the input are reused
+        instead of re-analyzed unless ``force`` is set.
+        """
+        logger.info(f"\n{'='*60}")
+        logger.info(f"🔍 Enhanced Sentiment Analysis - Scanning: {directory_path}")
+        logger.info(f"{'='*60}\n")
         
         if not os.path.exists(directory_path):
-            print(f"❌ Directory not found: {directory_path}")
+            logger.error(f"❌ Directory not found: {directory_path}")
             return {}
         
         json_files = [f for f in os.listdir(directory_path) 
                      if f.endswith('.json') and f.startswith('reddit_') 
                      and not f.startswith('sentiment_')]
         
-        print(f"📁 Found {len(json_files)} Reddit JSON files to analyze\n")
+        logger.info(f"📁 Found {len(json_files)} Reddit JSON files to analyze\n")
         
         all_analyses = {}
+        pending_writes = []
         
-        for idx, json_file in enumerate(json_files, 1):
-            print(f"\n[{idx}/{len(json_files)}] Processing: {json_file}")
+        # Reuse up-to-date outputs so unchanged inputs skip inference entirely
+        to_analyze = []
+        for json_file in json_files:
             file_path = os.path.join(directory_path, json_file)
-            analysis = self.analyze_json_file(file_path)
+            output_file = os.path.join(directory_path, f"enhanced_sentiment_{json_file}")
+            if (not force and os.path.exists(output_file)
+                    and os.path.getmtime(output_file) >= os.path.getmtime(file_path)):
+                try:
+                    cached = read_json(output_file)
+                    cached.pop('all_comments', None)
+                    all_analyses[json_file] = cached
+                    logger.info(f"♻️ Up to date, reusing: {output_file}")
+                    continue
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not reuse {output_file}, re-analyzing: {str(e)}")
+            to_analyze.append(json_file)
+        
+        file_paths = [os.path.join(directory_path, f) for f in to_analyze]
+        
+        # Pipeline: a reader thread loads the next file and a writer thread saves results
+        # while the model works on the current file, so inference never waits on disk.
+        with ThreadPoolExecutor(max_workers=1) as reader, ThreadPoolExecutor(max_workers=1) as writer:
+            next_load = reader.submit(read_json, file_paths[0]) if file_paths else None
             
-            if analysis:
-                all_analyses[json_file] = analysis
-                output_file = os.path.join(directory_path, f"enhanced_sentiment_{json_file}")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(analysis, f, indent=2, ensure_ascii=False)
-                print(f"💾 Saved enhanced analysis to: {output_file}")
-            else:
-                print(f"❌ Failed to analyze {json_file}")
+            for idx, json_file in enumerate(to_analyze, 1):
+                logger.info(f"\n[{idx}/{len(to_analyze)}] Processing: {json_file}")
+                file_path = file_paths[idx - 1]
+                current_load = next_load
+                next_load = reader.submit(read_json, file_paths[idx]) if idx < len(file_paths) else None
+                
+                try:
+                    data = current_load.result()
+                except Exception as e:
+                    logger.error(f"❌ Failed to read {json_file}: {str(e)}")
+                    continue
+                
+                analysis = self.analyze_json_file(file_path, data=data)
+                del data
+                
+                if analysis:
+                    output_file = os.path.join(directory_path, f"enhanced_sentiment_{json_file}")
+                    pending_writes.append((output_file, writer.submit(write_json, output_file, analysis, 'all_comments')))
+                    # Per-comment results already live in the per-file output; keep only the summary
+                    all_analyses[json_file] = {k: v for k, v in analysis.items() if k != 'all_comments'}
+                else:
+                    logger.error(f"❌ Failed to analyze {json_file}")
+        
+        for output_file, write in pending_writes:
+            try:
+                write.result()
+                logger.info(f"💾 Saved enhanced analysis to: {output_file}")
+            except Exception as e:
+                logger.error(f"❌ Failed to save {output_file}: {str(e)}")
+        
+        # Keep directory listing order regardless of which files came from cache
+        all_analyses = {f: all_analyses[f] for f in json_files if f in all_analyses}
         
         if all_analyses:
             combined_output = os.path.join(directory_path, "combined_enhanced_sentiment_analysis.json")
-            with open(combined_output, 'w', encoding='utf-8') as f:
-                json.dump(all_analyses, f, indent=2, ensure_ascii=False)
-            print(f"\n🎉 Combined enhanced results saved to: {combined_output}")
+            write_json(combined_output, all_analyses)
+            logger.info(f"\n🎉 Combined enhanced results saved to: {combined_output}")
         
         return all_analyses
 
 
 def main():
     """Main function to run enhanced sentiment analysis"""
+    logging.basicConfig(level=os.getenv("REVUAI_LOG", "INFO").upper(), format="%(message)s")
+    
     print("\n" + "="*60)
     print("🚀 Enhanced Reddit Sentiment Analysis - Emotion-Based Classification")
     print("="*60 + "\n")
@@ -9,20 +9,23 @@ PERFORMANCE OPTIMIZATION GUIDE:
 - Quantization for CPU (2-3x faster)
 """
 
-import torch
+import functools
 
-# Check GPU availability with detailed info
-CUDA_AVAILABLE = torch.cuda.is_available()
-DEVICE = 0 if CUDA_AVAILABLE else -1
-DEVICE_NAME = "GPU" if DEVICE == 0 else "CPU"
 
-# GPU information
-if CUDA_AVAILABLE:
-    GPU_NAME = torch.cuda.get_device_name(0)
-    GPU_MEMORY = torch.cuda.get_device_properties(0).total_memory / 1e9
-    GPU_INFO = f"{GPU_NAME} ({GPU_MEMORY:.1f} GB)"
-else:
-    GPU_INFO = "Not available"
+@functools.lru_cache(maxsize=1)
+def get_device():
+    """
+    Detect the inference device on first call (CUDA init is slow, so not at import time).
+    Returns (device, device_name, gpu_info) with device 0 for GPU and -1 for CPU.
+    """
+    import torch
+    
+    if torch.cuda.is_available():
+        gpu_name = torch.cuda.get_device_name(0)
+        gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1e9
+        return 0, "GPU", f"{gpu_name} ({gpu_memory:.1f} GB)"
+    return -1, "CPU", "Not available"
+
 
 # Model configurations (ordered by speed)
 SENTIMENT_MODELS = {
@@ -53,20 +56,47 @@ SENTIMENT_MODELS = {
 DEFAULT_MODEL = "ultra_fast"
 
 # Batch processing settings
-MAX_BATCH_SIZE = 64 if DEVICE == 0 else 32  # Larger batches on GPU
 TRUNCATE_LENGTH = 256  # Shorter = faster
 
-# CPU optimization (only if no GPU)
-USE_QUANTIZATION = DEVICE == -1  # Quantize on CPU for 2-3x speedup
-
-print(f"🚀 Sentiment Analysis Config:")
-print(f"   Device: {DEVICE_NAME}")
-if CUDA_AVAILABLE:
-    print(f"   GPU: {GPU_INFO}")
-print(f"   Model: {SENTIMENT_MODELS[DEFAULT_MODEL]['model']}")
-print(f"   Batch Size: {MAX_BATCH_SIZE}")
-print(f"   Truncate: {TRUNCATE_LENGTH} tokens")
-if USE_QUANTIZATION:
-    print(f"   CPU Quantization: Enabled")
-if not CUDA_AVAILABLE:
-    print(f"   💡 Install CUDA PyTorch for GPU acceleration: python setup_gpu.py")
\ No newline at end of file
+
+def get_max_batch_size():
+    return 64 if get_device()[0] == 0 else 32  # Larger batches on GPU
+
+
+def use_quantization():
+    return get_device()[0] == -1  # Quantize on CPU for 2-3x speedup
+
+
+# Device-dependent settings kept as module attributes, evaluated on first access
+_LAZY_SETTINGS = {
+    "DEVICE": lambda: get_device()[0],
+    "DEVICE_NAME": lambda: get_device()[1],
+    "GPU_INFO": lambda: get_device()[2],
+    "CUDA_AVAILABLE": lambda: get_device()[0] == 0,
+    "MAX_BATCH_SIZE": get_max_batch_size,
+    "USE_QUANTIZATION": use_quantization,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_SETTINGS:
+        return _LAZY_SETTINGS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def log_config():
+    """Print the active sentiment analysis configuration"""
+    device, device_name, gpu_info = get_device()
+    cuda_available = device == 0
+    
+    print(f"🚀 Sentiment Analysis Config:")
+    print(f"   Device: {device_name}")
+    if cuda_available:
+        print(f"   GPU: {gpu_info}")
+    print(f"   Model: {SENTIMENT_MODELS[DEFAULT_MODEL]['model']}")
+    print(f"   Batch Size: {get_max_batch_size()}")
+    print(f"   Truncate: {TRUNCATE_LENGTH} tokens")
+    if use_quantization():
+        print(f"   CPU Quantization: Enabled")
+    if not cuda_available:
+        print(f"   💡 Install CUDA PyTorch for GPU acceleration: python setup_gpu.py")
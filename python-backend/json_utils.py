@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+JSON helpers for Reddit / sentiment output files
+Uses orjson when installed (much faster), falls back to the standard library
+"""
+
+import gzip
+import json
+import os
+import tempfile
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from bytes or str"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Items of a streamed list encoded per write() call
+STREAM_CHUNK_SIZE = 1000
+
+# Permissions a plain open() would give a new file (temp files start out owner-only)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+DEFAULT_FILE_MODE = 0o666 & ~_UMASK
+
+
+def _write_streamed(f, obj: dict, stream_key: str) -> None:
+    """Write dict obj with its list obj[stream_key] encoded in chunks, emitted as the last key"""
+    head = dumps({key: value for key, value in obj.items() if key != stream_key})
+    f.write(head[:-1])
+    if len(head) > 2:
+        f.write(b',')
+    f.write(dumps(stream_key) + b':[')
+    items = obj[stream_key]
+    for start in range(0, len(items), STREAM_CHUNK_SIZE):
+        if start:
+            f.write(b',')
+        f.write(b','.join(map(dumps, items[start:start + STREAM_CHUNK_SIZE])))
+    f.write(b']}')
+
+
+def write_json(path: str, obj, stream_key: str = None, mode: int = None) -> None:
+    """
+    Write compact JSON to path (gzip level 1 if path ends with .gz).
+    Writes to a uniquely named temp file next to path and renames it over path, so readers never
+    see a partial file and concurrent writers of the same path never share a temp file.
+    stream_key: a top-level list of obj (e.g. 'comments') to encode a chunk at a time, so the
+    whole document is never held in memory as one encoded buffer.
+    mode: permission bits for the file (e.g. 0o600 for secrets), applied before any data is written
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp'
+    )
+    os.close(fd)
+    try:
+        # mkstemp creates the file owner-only; widen it to the requested (or usual) permissions
+        os.chmod(tmp_path, DEFAULT_FILE_MODE if mode is None else mode)
+        if path.endswith('.gz'):
+            f = gzip.open(tmp_path, 'wb', compresslevel=1)
+        else:
+            f = open(tmp_path, 'wb')
+        with f:
+            if stream_key is None:
+                f.write(dumps(obj))
+            else:
+                _write_streamed(f, obj, stream_key)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path: str):
+    """Read a JSON file written by write_json (transparently decompresses .gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return loads(f.read())
@@ -7,12 +7,456 @@ Maximum speed with proven filtering logic
 import os
 import time
 import base64
+import heapq
 import random
 import threading
+from collections import OrderedDict, deque
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from itertools import count, cycle
+from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from urllib.parse import quote_plus, urlencode
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from json_utils import loads as json_loads, read_json, write_json
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+ACCOUNT_FIELDS = ('client_id', 'client_secret', 'username', 'password')
+
+# Placeholder bodies of deleted / removed comments
+_REMOVED_BODIES = frozenset(('[deleted]', '[removed]'))
+
+
+class RedditAuthError(Exception):
+    """Reddit rejected an account's credentials"""
+
+
+def _is_set(event: Optional[threading.Event]) -> bool:
+    return event is not None and event.is_set()
+
+
+# Per-request failures a fetch phase reports and skips: network/HTTP errors, auth failures,
+# and malformed or unexpected payloads. Anything else is a bug and propagates.
+FETCH_ERRORS = (requests.RequestException, RedditAuthError, ValueError, LookupError)
+
+# post_hint values of image / video posts, which have no text to analyze
+MEDIA_HINTS = frozenset(('image', 'hosted:video', 'rich:video'))
+
+# Phase-1 search strategies as (sort, time filter)
+SEARCH_STRATEGIES = (
+    ('top', 'month'),
+    ('top', 'year'),
+    ('relevance', 'all'),
+    ('comments', 'month'),
+    ('top', 'week'),
+    ('hot', 'month'),
+    ('top', 'all'),
+    ('hot', 'week'),
+    ('relevance', 'month'),
+    ('top', 'day'),
+    ('hot', 'day'),
+    ('comments', 'week'),
+)
+
+# Retry transient API failures with exponential backoff and full jitter
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 30.0  # seconds
+
+# An account whose credentials Reddit rejects is skipped (and not re-authenticated) for this long
+AUTH_FAILURE_BACKOFF = 300.0  # seconds
+
+# Phase-2 comment workers: one per allowed in-flight request per account; the per-account
+# rate controller scales actual concurrency down when Reddit pushes back
+MAX_IN_FLIGHT_PER_ACCOUNT = 8
+MAX_COMMENT_WORKERS = 32
+
+# Strict-mode phase 2 skips posts with fewer comments than this (a fixed floor: comment
+# scores don't track thread size, so it must not scale with min_score)
+MIN_POST_COMMENTS = 10
+
+# Reddit's OAuth quota per client: paced with a token bucket so accounts don't drain it in bursts
+REQUESTS_PER_MINUTE = 100
+
+# How often a request waiting for admission checks whether its fetch was stopped
+STOP_POLL_INTERVAL = 0.1  # seconds
+
+# Search listings reused for identical URLs within this many seconds (0 disables)
+SEARCH_CACHE_TTL = float(os.getenv('REVUAI_SEARCH_CACHE_TTL', 900))
+SEARCH_CACHE_MAX_ENTRIES = 256
+
+# Access tokens persisted across process restarts, keyed by client_id:username
+# (set REVUAI_TOKEN_CACHE to another path, or to an empty string to disable)
+TOKEN_CACHE_PATH = os.getenv(
+    'REVUAI_TOKEN_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'revuai', 'tokens.json')
+)
+
+
+def load_accounts(env=None) -> List[Dict[str, str]]:
+    """
+    Load Reddit accounts from REDDIT_<FIELD>_<n> environment variables in one pass.
+    Un-numbered REDDIT_<FIELD> variables fill in account 1.
+    """
+    env = os.environ if env is None else env
+    numbered: Dict[int, Dict[str, str]] = {}
+    unnumbered: Dict[str, str] = {}
+
+    for key, value in env.items():
+        if not value or not key.startswith('REDDIT_'):
+            continue
+        name = key[len('REDDIT_'):]
+        field, _, suffix = name.rpartition('_')
+        if suffix.isdigit() and field.lower() in ACCOUNT_FIELDS:
+            numbered.setdefault(int(suffix), {})[field.lower()] = value
+        elif name.lower() in ACCOUNT_FIELDS:
+            unnumbered[name.lower()] = value
+
+    if unnumbered:
+        account_1 = numbered.setdefault(1, {})
+        for field, value in unnumbered.items():
+            account_1.setdefault(field, value)
+
+    accounts = []
+    for idx in sorted(numbered):
+        creds = numbered[idx]
+        if not all(creds.get(field) for field in ACCOUNT_FIELDS):
+            print(f"⚠️ Skipping Reddit account {idx}: missing credentials")
+            continue
+        accounts.append({field: creds[field] for field in ACCOUNT_FIELDS})
+    return accounts
+
+
+def make_relevance_matcher(query: str, relaxed: bool = False):
+    """
+    Build the relevance check for one query, lowercasing and splitting the query once.
+    Returns a function text -> bool that is True if the query terms appear in text.
+    """
+    if not query:
+        return lambda text: False
+    
+    query_lower = query.lower()
+    query_terms = query_lower.split()
+    
+    # For single word: direct match
+    if len(query_terms) == 1:
+        def matches(text_lower):
+            return query_lower in text_lower
+    
+    # STRICT MODE (high engagement): Full phrase OR all terms
+    elif not relaxed:
+        def matches(text_lower):
+            return query_lower in text_lower or all(term in text_lower for term in query_terms)
+    
+    # 🆕 RELAXED MODE (low engagement): Any majority of terms
+    # Example: "iphone 15 pro" → accept if 2 of 3 terms present
+    else:
+        required_terms = max(1, len(query_terms) // 2 + 1)  # Majority
+        
+        def matches(text_lower):
+            if query_lower in text_lower:
+                return True
+            return sum(1 for term in query_terms if term in text_lower) >= required_terms
+    
+    def is_relevant(text: str) -> bool:
+        return bool(text) and matches(text.lower())
+    
+    return is_relevant
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after_seconds(headers) -> Optional[float]:
+    """Retry-After as seconds to wait; the header may be a number of seconds or an HTTP-date"""
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilling `rate` tokens per second, holding at most `capacity`.
+    Its whole state is one "zero time" (when the bucket would have been empty):
+    tokens = min(capacity, (now - zero_time) * rate). Reading the level is a single attribute
+    read and needs no lock; taking a token moves zero_time forward under the lock.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._zero_time = time.monotonic() - capacity / rate  # Starts full
+        self._lock = threading.Lock()
+    
+    def _tokens(self, now: float) -> float:
+        return min(self.capacity, (now - self._zero_time) * self.rate)
+    
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Take one token, sleeping until one is available; False (nothing taken) once `stop` is set"""
+        while True:
+            if _is_set(stop):
+                return False
+            with self._lock:
+                now = time.monotonic()
+                tokens = self._tokens(now)
+                if tokens >= 1:
+                    self._zero_time = now - (tokens - 1) / self.rate
+                    return True
+                wait = (1 - tokens) / self.rate
+            if stop is None:
+                time.sleep(wait)
+            else:
+                stop.wait(min(wait, STOP_POLL_INTERVAL))
+    
+    def available(self) -> float:
+        """Tokens available right now (lock-free)"""
+        return self._tokens(time.monotonic())
+    
+    def penalize(self, seconds: float) -> None:
+        """Push the next available token at least `seconds` into the future"""
+        with self._lock:
+            self._zero_time = max(self._zero_time, time.monotonic() + seconds - 1 / self.rate)
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire `ttl` seconds after insertion (oldest evicted first)"""
+    
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            return value
+    
+    def put(self, key, value) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class BoundedExecutor:
+    """
+    Runs one caller's tasks on a shared executor, at most `width` of them at a time.
+    Tasks past the limit wait here rather than in the executor's queue, so other callers of the
+    executor aren't held up behind them, and cancelling a waiting task's future drops it
+    without it ever running.
+    """
+    
+    def __init__(self, executor: ThreadPoolExecutor, width: int):
+        self._executor = executor
+        self._free = max(1, width)
+        self._waiting = deque()
+        self._lock = threading.Lock()
+    
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            self._waiting.append((future, fn, args, kwargs))
+            self._dispatch()
+        return future
+    
+    def cancel_waiting(self) -> None:
+        """Cancel every task that hasn't started yet"""
+        with self._lock:
+            while self._waiting:
+                self._waiting.popleft()[0].cancel()
+    
+    def _dispatch(self) -> None:
+        # Called under _lock: start waiting tasks while there is a free slot, skipping cancelled ones
+        while self._free > 0 and self._waiting:
+            future, fn, args, kwargs = self._waiting.popleft()
+            if future.set_running_or_notify_cancel():
+                self._free -= 1
+                self._executor.submit(self._run, future, fn, args, kwargs)
+    
+    def _run(self, future: Future, fn, args, kwargs) -> None:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._free += 1
+                self._dispatch()
+
+
+class TokenSlot:
+    """
+    One account's cached access token. Readers check it without locking; refreshes
+    happen under `lock`. The expiry is kept on the monotonic clock for validity checks and
+    on the wall clock for the on-disk cache shared with other processes.
+    """
+    
+    __slots__ = ('token', 'headers', 'expires_at', 'expires_at_wall', 'auth_error', 'auth_failed_until', 'lock')
+    
+    def __init__(self):
+        self.token = None
+        self.headers = None
+        self.expires_at = 0.0
+        self.expires_at_wall = 0.0
+        self.auth_error = None  # Last rejected refresh, re-raised until auth_failed_until
+        self.auth_failed_until = 0.0
+        self.lock = threading.Lock()
+    
+    def valid(self) -> bool:
+        return self.token is not None and time.monotonic() < self.expires_at
+    
+    def raise_if_auth_failed(self) -> None:
+        """Re-raise a recent credential rejection instead of asking the token endpoint again"""
+        if self.auth_error is not None and time.monotonic() < self.auth_failed_until:
+            raise self.auth_error
+    
+    def set(self, token: str, expires_in: float) -> None:
+        """Store a token valid for `expires_in` more seconds, with its request header built once"""
+        self.headers = {'Authorization': f"Bearer {token}"}
+        self.expires_at = time.monotonic() + expires_in
+        self.expires_at_wall = time.time() + expires_in
+        self.token = token
+
+
+class RateController:
+    """
+    AIMD admission control for one Reddit account, shared by all worker threads.
+    The number of in-flight requests grows by `alpha` after each healthy response and is
+    multiplied by `beta` on 429/5xx or when the x-ratelimit headers show the quota nearly spent.
+    When the quota is exhausted (or the server asks to back off), new requests wait for the reset.
+    Requests are also paced by a token bucket at REQUESTS_PER_MINUTE.
+    """
+    
+    def __init__(self, c_min: int = 1, c_max: int = MAX_IN_FLIGHT_PER_ACCOUNT, alpha: float = 0.5, beta: float = 0.5,
+                 low_quota_ratio: float = 0.1):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.alpha = alpha
+        self.beta = beta
+        self.low_quota_ratio = low_quota_ratio
+        self.limit = float(c_max)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.disabled_until = 0.0  # Set while the account can't authenticate
+        self.quota_fraction = 1.0  # Share of the rate-limit window left, from the last response
+        self.bucket = TokenBucket(rate=REQUESTS_PER_MINUTE / 60, capacity=REQUESTS_PER_MINUTE)
+        self._cond = threading.Condition()
+    
+    @contextmanager
+    def admit(self, stop: Optional[threading.Event] = None):
+        """
+        Block until any backoff pause is over and a request slot is free, then take a bucket token.
+        The token is taken last so none are spent while waiting; a pause that starts during the
+        bucket wait (a 429 elsewhere) is waited out again before the request is let through.
+        Yields True once admitted, or False as soon as `stop` is set while waiting (no token is
+        taken if it is set before the bucket wait ends).
+        """
+        poll = None if stop is None else STOP_POLL_INTERVAL
+        admitted = False
+        with self._cond:
+            while not _is_set(stop):
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause if poll is None else min(pause, poll))
+                elif self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    admitted = True
+                    break
+                else:
+                    self._cond.wait(poll)
+        if not admitted:
+            yield False
+            return
+        try:
+            if self.bucket.acquire(stop):
+                with self._cond:
+                    pause = self.paused_until - time.monotonic()
+                    while pause > 0 and not _is_set(stop):
+                        self._cond.wait(pause if poll is None else min(pause, poll))
+                        pause = self.paused_until - time.monotonic()
+            yield not _is_set(stop)
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+    
+    def observe(self, status_code: int, headers) -> None:
+        """Adjust concurrency from a response's status and rate-limit headers"""
+        remaining = _header_float(headers, 'x-ratelimit-remaining')
+        used = _header_float(headers, 'x-ratelimit-used')
+        reset = _header_float(headers, 'x-ratelimit-reset')
+        retry_after = _retry_after_seconds(headers) if status_code == 429 else None
+        
+        with self._cond:
+            if remaining is not None and used is not None and remaining + used > 0:
+                self.quota_fraction = remaining / (remaining + used)
+            if status_code == 429 or status_code >= 500:
+                self.limit = max(self.c_min, self.limit * self.beta)
+                if status_code == 429:
+                    backoff = retry_after or reset or 1.0
+                    self._pause(backoff)
+                    # Drain the bucket too, so no burst of saved-up tokens follows the pause
+                    self.bucket.penalize(backoff)
+            elif remaining is not None and remaining < 1:
+                # Quota spent: hold new requests until the window resets
+                self.limit = max(self.c_min, self.limit * self.beta)
+                self._pause(reset or 1.0)
+            elif remaining is not None and used is not None and remaining < (remaining + used) * self.low_quota_ratio:
+                self.limit = max(self.c_min, self.limit * self.beta)
+            else:
+                self.limit = min(self.c_max, self.limit + self.alpha)
+            self._cond.notify_all()
+    
+    def headroom(self):
+        """
+        Sort key for account selection: usable (not disabled), not paused, then able to send now,
+        then quota left
+        """
+        now = time.monotonic()
+        free_slots = int(self.limit) - self.in_flight
+        return (now >= self.disabled_until, now >= self.paused_until,
+                free_slots > 0 and self.bucket.available() >= 1, self.quota_fraction, free_slots)
+    
+    def disable(self, seconds: float) -> None:
+        """Rank the account last for account selection for `seconds`"""
+        self.disabled_until = max(self.disabled_until, time.monotonic() + seconds)
+    
+    def _pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
 
 
 class MultiAccountRedditFetcher:
@@ -24,31 +468,35 @@ class MultiAccountRedditFetcher:
             self.accounts = accounts
         else:
             # Auto-load from .env
-            self.accounts = []
-            idx = 1
-            while True:
-                client_id = os.getenv(f'REDDIT_CLIENT_ID_{idx}') or (os.getenv('REDDIT_CLIENT_ID') if idx == 1 else None)
-                client_secret = os.getenv(f'REDDIT_CLIENT_SECRET_{idx}') or (os.getenv('REDDIT_CLIENT_SECRET') if idx == 1 else None)
-                username = os.getenv(f'REDDIT_USERNAME_{idx}') or (os.getenv('REDDIT_USERNAME') if idx == 1 else None)
-                password = os.getenv(f'REDDIT_PASSWORD_{idx}') or (os.getenv('REDDIT_PASSWORD') if idx == 1 else None)
-                
-                if not all([client_id, client_secret, username, password]):
-                    break
-                
-                self.accounts.append({
-                    'client_id': client_id,
-                    'client_secret': client_secret,
-                    'username': username,
-                    'password': password
-                })
-                idx += 1
-        
-        # Token cache per account
-        self.tokens = {}
-        self.token_locks = {i: threading.Lock() for i in range(len(self.accounts))}
+            self.accounts = load_accounts()
+        
+        # Token cache per account, seeded from tokens saved by earlier processes
+        self.token_slots = [TokenSlot() for _ in self.accounts]
+        self._load_token_cache()
+        
+        # Raw search listings by URL: repeated searches for a query skip the API
+        self.search_cache = TTLCache(SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES)
+        
+        # Reddit rate limits are per OAuth client, so each account gets its own controller
+        self.rate_controllers = [RateController() for _ in self.accounts]
+        # Rotates where the account scan starts, so ties in headroom are spread round-robin
+        self._pick_counter = count()
         
         self.user_agent = 'RevuAI/4.0 by RevuAI Team'
         
+        # Token-request headers and form body per account, encoded once (credentials don't change)
+        self._token_requests = [self._build_token_request(acc) for acc in self.accounts]
+        
+        # One long-lived session so every call reuses keep-alive connections
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = self.user_agent
+        self._pool_size = 0
+        self._ensure_pool_size(self._default_comment_workers())
+        
+        # Long-lived worker threads shared by every fetch (threads start lazily and are reused)
+        self._workers = self._default_comment_workers()
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='reddit-fetch')
+        
         # Validate
         for idx, acc in enumerate(self.accounts):
             if not all([acc['client_id'], acc['client_secret'], acc['username'], acc['password']]):
@@ -56,52 +504,289 @@ class MultiAccountRedditFetcher:
         
         print(f"🚀 Initialized with {len(self.accounts)} account(s)")
         
+    def _default_comment_workers(self) -> int:
+        # At least one: a fetcher without accounts must still construct (the app reports it via /health)
+        return max(1, min(len(self.accounts) * MAX_IN_FLIGHT_PER_ACCOUNT, MAX_COMMENT_WORKERS))
+    
+    @contextmanager
+    def _worker_pool(self, workers: int):
+        """
+        An executor running at most `workers` of this call's tasks at once: on the shared threads,
+        or on a one-off pool when a call asks for more workers than the shared executor has.
+        Tasks still waiting when the call leaves the block are cancelled.
+        """
+        if workers <= self._workers:
+            pool = nullcontext(self._executor)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        with pool as threads:
+            executor = BoundedExecutor(threads, workers)
+            try:
+                yield executor
+            finally:
+                executor.cancel_waiting()
+    
+    def _ensure_pool_size(self, workers: int):
+        """
+        Keep enough pooled keep-alive connections per host for every worker thread.
+        requests defaults to 10, so extra workers would open (and discard) fresh TLS connections.
+        """
+        if workers <= self._pool_size:
+            return
+        # No transport-level retries: _api_get retries with backoff and feeds the rate controllers
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=0)
+        self.session.mount('https://', adapter)
+        self._pool_size = workers
+    
+    def _pick_account(self) -> int:
+        """
+        Account with the most headroom right now (see RateController.headroom); equally good
+        accounts take turns. Lock-free: next() on itertools.count is atomic under the GIL and
+        headroom() only reads controller state.
+        """
+        controllers = self.rate_controllers
+        n = len(controllers)
+        start = next(self._pick_counter) % n
+        return max(((start + k) % n for k in range(n)), key=lambda i: controllers[i].headroom())
+    
+    def _api_get(
+        self,
+        url: str,
+        account_idx: Optional[int],
+        timeout: int = 15,
+        stop: Optional[threading.Event] = None
+    ) -> Optional[requests.Response]:
+        """
+        GET an oauth.reddit.com URL as the given account, under that account's rate controller.
+        Returns None once `stop` is set, including while waiting for admission or a retry, without
+        sending (or spending a rate-limit token on) anything further.
+        With account_idx=None the account with the most quota headroom is picked per attempt.
+        A 401 discards the account's cached token (memory and disk) and retries once with a fresh one.
+        429/5xx responses and connection errors are retried with exponential backoff and full
+        jitter; a Retry-After pause is enforced by the controller before the next attempt.
+        """
+        reauthenticated = set()
+        for attempt in range(MAX_RETRIES + 1):
+            if _is_set(stop):
+                return None
+            idx = self._pick_account() if account_idx is None else account_idx
+            controller = self.rate_controllers[idx]
+            try:
+                headers = self._auth_headers(idx)
+                with controller.admit(stop) as admitted:
+                    if not admitted:
+                        return None
+                    response = self.session.get(url, headers=headers, timeout=timeout)
+            except RedditAuthError:
+                if account_idx is not None or attempt == MAX_RETRIES:
+                    raise
+                # The account is disabled now, so the next pick is a different one
+                continue
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                controller.observe(response.status_code, response.headers)
+                if response.status_code == 401 and idx not in reauthenticated and attempt < MAX_RETRIES:
+                    # Token revoked or expired early: drop it and refresh once
+                    self._invalidate_token(idx, headers)
+                    reauthenticated.add(idx)
+                    continue
+                if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return response
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            if stop is None:
+                time.sleep(delay)
+            else:
+                stop.wait(delay)
+    
     def get_access_token(self, account_idx: int = 0) -> str:
-        """Get OAuth token with caching"""
-        with self.token_locks[account_idx]:
-            cache_key = f"token_{account_idx}"
-            cache = self.tokens.get(cache_key, {})
-            
-            # Return cached if valid
-            if cache.get('token') and time.time() < cache.get('expires_at', 0):
-                return cache['token']
+        """
+        Get OAuth token with caching.
+        Valid tokens are returned without locking; on expiry one thread refreshes while
+        the others wait on the account's lock and then reuse the new token.
+        """
+        slot = self.token_slots[account_idx]
+        if slot.valid():
+            return slot.token
+        slot.raise_if_auth_failed()
+        
+        with slot.lock:
+            # Re-check: another thread (or, via the disk cache, another process) may have refreshed,
+            # or may just have been refused
+            if slot.valid() or (self._load_token_cache(account_idx) and slot.valid()):
+                return slot.token
+            slot.raise_if_auth_failed()
             
             # Fetch new token
-            acc = self.accounts[account_idx]
-            auth_string = f"{acc['client_id']}:{acc['client_secret']}"
-            encoded_auth = base64.b64encode(auth_string.encode()).decode()
-            
-            headers = {
-                'Authorization': f'Basic {encoded_auth}',
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'User-Agent': self.user_agent
-            }
-            
-            data = {
-                'grant_type': 'password',
-                'username': acc['username'],
-                'password': acc['password']
-            }
-            
-            response = requests.post(
+            headers, data = self._token_requests[account_idx]
+            response = self.session.post(
                 'https://www.reddit.com/api/v1/access_token',
                 headers=headers,
                 data=data,
                 timeout=10
             )
             
-            if not response.ok:
-                raise Exception(f"Auth failed for account {account_idx}: {response.text}")
+            if response.status_code in RETRY_STATUSES:
+                # Token endpoint busy or down: transient, retried by the caller like a network error
+                raise requests.HTTPError(
+                    f"Token request failed for account {account_idx + 1}: HTTP {response.status_code}",
+                    response=response
+                )
             
-            token_data = response.json()
+            try:
+                token_data = json_loads(response.content) if response.ok else {}
+            except ValueError:
+                token_data = {}
             
-            # Cache token (55 min expiry buffer)
-            self.tokens[cache_key] = {
-                'token': token_data['access_token'],
-                'expires_at': time.time() + (token_data['expires_in'] - 300)
-            }
+            # Reddit answers a wrong password with 200 {"error": "invalid_grant"}
+            if 'access_token' not in token_data:
+                error = RedditAuthError(f"Auth failed for account {account_idx + 1}: {response.text}")
+                slot.auth_error = error
+                slot.auth_failed_until = time.monotonic() + AUTH_FAILURE_BACKOFF
+                self.rate_controllers[account_idx].disable(AUTH_FAILURE_BACKOFF)
+                print(f"  ❌ Account {account_idx + 1} rejected by Reddit; skipping it for {AUTH_FAILURE_BACKOFF:.0f}s")
+                raise error
+            
+            slot.auth_error = None
+            # Cache token (5 min expiry buffer)
+            slot.set(token_data['access_token'], token_data['expires_in'] - 300)
+            self._save_token_cache(account_idx)
             
-            return token_data['access_token']
+            return slot.token
+    
+    def _prewarm_tokens(self) -> None:
+        """Refresh every expired account token in parallel, so workers start on the lock-free path"""
+        stale = [i for i, slot in enumerate(self.token_slots) if not slot.valid()]
+        futures = {self._executor.submit(self.get_access_token, i): i for i in stale}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except FETCH_ERRORS as e:
+                # Requests on this account retry auth (and report the failure) themselves
+                print(f"  ⚠️ Token prefetch failed for account {futures[future] + 1}: {e}")
+    
+    def _build_token_request(self, acc: Dict[str, str]):
+        """Headers and urlencoded body of an account's password-grant token request"""
+        auth_string = f"{acc['client_id']}:{acc['client_secret']}"
+        encoded_auth = base64.b64encode(auth_string.encode()).decode()
+        
+        headers = {
+            'Authorization': f'Basic {encoded_auth}',
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'User-Agent': self.user_agent
+        }
+        
+        data = urlencode({
+            'grant_type': 'password',
+            'username': acc['username'],
+            'password': acc['password']
+        }).encode()
+        
+        return headers, data
+    
+    @staticmethod
+    def _token_cache_key(acc: Dict[str, str]) -> str:
+        return f"{acc['client_id']}:{acc['username']}"
+    
+    @contextmanager
+    def _token_cache_lock(self):
+        """Exclusive lock on the token cache file across processes (no-op without fcntl)"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(TOKEN_CACHE_PATH + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _read_token_cache(self) -> Dict[str, Any]:
+        try:
+            return read_json(TOKEN_CACHE_PATH)
+        except FileNotFoundError:
+            return {}
+    
+    def _load_token_cache(self, account_idx: Optional[int] = None) -> bool:
+        """
+        Reuse still-valid tokens saved by other processes so restarts skip auth
+        (all accounts, or just account_idx). Returns True if any token was loaded.
+        """
+        if not TOKEN_CACHE_PATH:
+            return False
+        try:
+            saved = self._read_token_cache()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable token cache: {e}")
+            return False
+        
+        indices = range(len(self.accounts)) if account_idx is None else (account_idx,)
+        now = time.time()
+        loaded = False
+        for i in indices:
+            entry = saved.get(self._token_cache_key(self.accounts[i]))
+            if entry and now < entry.get('expires_at', 0):
+                self.token_slots[i].set(entry['token'], entry['expires_at'] - now)
+                loaded = True
+        return loaded
+    
+    def _save_token_cache(self, account_idx: int) -> None:
+        """Merge this account's fresh token into the on-disk cache (atomic replace, owner-only)"""
+        if not TOKEN_CACHE_PATH:
+            return
+        slot = self.token_slots[account_idx]
+        try:
+            os.makedirs(os.path.dirname(TOKEN_CACHE_PATH) or '.', mode=0o700, exist_ok=True)
+            with self._token_cache_lock():
+                try:
+                    saved = self._read_token_cache()
+                except ValueError:
+                    saved = {}
+                now = time.time()
+                saved = {key: entry for key, entry in saved.items() if now < entry.get('expires_at', 0)}
+                saved[self._token_cache_key(self.accounts[account_idx])] = {
+                    'token': slot.token,
+                    'expires_at': slot.expires_at_wall
+                }
+                write_json(TOKEN_CACHE_PATH, saved, mode=0o600)
+        except OSError as e:
+            print(f"⚠️ Could not save token cache: {e}")
+    
+    def _invalidate_token(self, account_idx: int, rejected_headers: Dict[str, str]) -> None:
+        """
+        Forget a token the API answered 401 to, in memory and on disk, so the next request
+        refreshes it. A no-op if another thread has already replaced it.
+        """
+        slot = self.token_slots[account_idx]
+        with slot.lock:
+            if slot.headers is not rejected_headers:
+                return
+            rejected_token = slot.token
+            slot.token = None
+            slot.expires_at = 0.0
+            if not TOKEN_CACHE_PATH:
+                return
+            key = self._token_cache_key(self.accounts[account_idx])
+            try:
+                with self._token_cache_lock():
+                    try:
+                        saved = self._read_token_cache()
+                    except ValueError:
+                        return
+                    # Another process may already have stored a fresh token
+                    if saved.get(key, {}).get('token') == rejected_token:
+                        del saved[key]
+                        write_json(TOKEN_CACHE_PATH, saved, mode=0o600)
+            except OSError as e:
+                print(f"⚠️ Could not update token cache: {e}")
+    
+    def _auth_headers(self, account_idx: int) -> Dict[str, str]:
+        """Per-request headers for an API call (User-Agent is set on the session)"""
+        slot = self.token_slots[account_idx]
+        if not slot.valid():
+            self.get_access_token(account_idx)
+        return slot.headers
     
     def _is_relevant(self, text: str, query: str, relaxed: bool = False) -> bool:
         """
@@ -114,39 +799,7 @@ class MultiAccountRedditFetcher:
         
         Returns True if query terms appear in text
         """
-        if not text or not query:
-            return False
-        
-        text_lower = text.lower()
-        query_lower = query.lower()
-        
-        # Split query into terms
-        query_terms = query_lower.split()
-        
-        # For single word: direct match
-        if len(query_terms) == 1:
-            return query_lower in text_lower
-        
-        # STRICT MODE (high engagement): Full phrase OR all terms
-        if not relaxed:
-            # Check for exact phrase
-            if query_lower in text_lower:
-                return True
-            # Check if all terms present
-            return all(term in text_lower for term in query_terms)
-        
-        # 🆕 RELAXED MODE (low engagement): Any majority of terms
-        # Example: "iphone 15 pro" → accept if 2 of 3 terms present
-        else:
-            # Check for exact phrase first
-            if query_lower in text_lower:
-                return True
-            
-            # Accept if majority of terms present (>50%)
-            terms_present = sum(1 for term in query_terms if term in text_lower)
-            required_terms = max(1, len(query_terms) // 2 + 1)  # Majority
-            
-            return terms_present >= required_terms
+        return make_relevance_matcher(query, relaxed=relaxed)(text)
     
     def fetch_posts_batch(
         self,
@@ -155,60 +808,63 @@ class MultiAccountRedditFetcher:
         sort: str = 'top',
         time_filter: str = 'month',
         account_idx: int = 0,
-        relaxed: bool = False
+        relaxed: bool = False,
+        query_encoded: Optional[str] = None,
+        subreddits: Optional[List[str]] = None
     ) -> List[Dict]:
-        """Fetch posts with adaptive filtering"""
-        token = self.get_access_token(account_idx)
-        
-        url = (
-            f"https://oauth.reddit.com/search.json"
-            f"?q={requests.utils.quote(query.strip())}"
-            f"&limit={limit}"
-            f"&sort={sort}"
-            f"&t={time_filter}"
-            f"&raw_json=1"
-        )
-        
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'User-Agent': self.user_agent
-        }
-        
-        response = requests.get(url, headers=headers, timeout=15)
-        
-        if not response.ok:
-            if response.status_code == 429:
-                print(f"  ⚠️ Account {account_idx + 1} rate limited")
-                time.sleep(30)
-            return []
+        """
+        Fetch posts with adaptive filtering.
+        query_encoded: quote_plus(query.strip()), when the caller already has it
+        subreddits: search only these subreddits, all in one request (r/a+b+c)
+        """
+        if query_encoded is None:
+            query_encoded = quote_plus(query.strip())
+        # Built once; _api_get reuses the same URL across retries
+        params = f"limit={int(limit)}&sort={quote_plus(sort)}&t={quote_plus(time_filter)}&raw_json=1"
+        if subreddits:
+            url = (f"https://oauth.reddit.com/r/{'+'.join(map(quote_plus, subreddits))}/search.json"
+                   f"?q={query_encoded}&restrict_sr=on&{params}")
+        else:
+            url = f"https://oauth.reddit.com/search.json?q={query_encoded}&{params}"
         
-        data = response.json()
-        posts = data['data']['children']
+        posts = self.search_cache.get(url)
+        if posts is None:
+            response = self._api_get(url, account_idx)
+            
+            if not response.ok:
+                if response.status_code == 429:
+                    # The account's rate controller holds its next requests until the limit resets
+                    print(f"  ⚠️ Account {account_idx + 1} rate limited")
+                return []
+            
+            data = json_loads(response.content)
+            posts = data['data']['children']
+            self.search_cache.put(url, posts)
         
         # ✅ ADAPTIVE FILTER: Relaxed for low-engagement queries
+        is_relevant = make_relevance_matcher(query, relaxed=relaxed)
+        # 🆕 ADAPTIVE: Lower engagement threshold for low-engagement queries
+        min_comments = 2 if relaxed else 5
         text_posts = []
         for post in posts:
             p = post['data']
             
-            # Skip videos/images
-            if p.get('is_video') or p.get('post_hint') in ['image', 'hosted:video', 'rich:video']:
+            # Cheapest checks first: engagement, then videos/images
+            if p.get('num_comments', 0) < min_comments:
+                continue
+            if p.get('is_video') or p.get('post_hint') in MEDIA_HINTS:
                 continue
             
             # Skip posts with no meaningful text
-            selftext = p.get('selftext', '').strip()
-            title = p.get('title', '')
+            selftext = (p.get('selftext') or '').strip()
+            title = p.get('title') or ''
             
             if not selftext and len(title) < 20:
                 continue
             
-            # 🆕 ADAPTIVE: Lower engagement threshold for low-engagement queries
-            min_comments = 2 if relaxed else 5
-            if p.get('num_comments', 0) < min_comments:
-                continue
-            
             # ✅ Relevance check with adaptive mode
             combined_text = f"{title} {selftext}"
-            if not self._is_relevant(combined_text, query, relaxed=relaxed):
+            if not is_relevant(combined_text):
                 continue
             
             text_posts.append(post)
@@ -220,91 +876,110 @@ class MultiAccountRedditFetcher:
         permalink: str,
         limit: int = 50,
         min_score: int = 5,
-        account_idx: int = 0,
+        account_idx: Optional[int] = 0,
         query: str = "",
-        relaxed: bool = False
+        relaxed: bool = False,
+        stop: Optional[threading.Event] = None
     ) -> List[Dict]:
-        """Fetch comments with adaptive relevance filtering"""
-        token = self.get_access_token(account_idx)
+        """
+        Fetch comments with adaptive relevance filtering.
+        account_idx=None lets the fetcher pick the account with the most quota headroom.
+        Once `stop` is set the call returns [] without requesting or parsing anything further
+        (a request still waiting for admission is dropped before it spends a rate-limit token).
+        """
+        if _is_set(stop):
+            return []
         
         clean_permalink = permalink[1:] if permalink.startswith('/') else permalink
         
-        url = (
-            f"https://oauth.reddit.com/{clean_permalink}.json"
-            f"?limit={limit}"
-            f"&sort=top"
-            f"&raw_json=1"
-        )
+        # Reply levels walked below top-level comments (deeper in relaxed mode)
+        max_depth = 4 if relaxed else 3
         
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'User-Agent': self.user_agent
-        }
+        # depth= stops Reddit from sending reply levels we would discard anyway;
+        # showmore=false drops the "load more comments" stubs the walk skips
+        url = f"https://oauth.reddit.com/{clean_permalink}.json?" + urlencode({
+            'limit': limit,
+            'depth': max_depth + 1,
+            'sort': 'top',
+            'showmore': 'false',
+            'raw_json': 1
+        })
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = self._api_get(url, account_idx, stop=stop)
         
-        if not response.ok:
+        if response is None or not response.ok or _is_set(stop):
             return []
         
-        data = response.json()
+        data = json_loads(response.content)
         
-        # Extract post title
-        post_title = data[0]['data']['children'][0]['data'].get('title', '')
+        # Extract post id and title (the title is only used for relevance checks; records carry post_id)
+        post_data = data[0]['data']['children'][0]['data']
+        post_id = post_data.get('id', '')
+        post_title = post_data.get('title', '')
         
         # Flatten comments
         comments_data = data[1]['data']['children'] if len(data) > 1 else []
         
         lightweight_comments = []
+        append = lightweight_comments.append
+        is_relevant = make_relevance_matcher(query, relaxed=relaxed)
+        min_length = 5 if relaxed else 10  # 🆕 Relaxed mode: Accept shorter comments
         
-        def extract_comments(comment_list, depth=0):
-            for comment in comment_list:
-                if comment.get('kind') != 't1':
-                    continue
-                
-                c = comment['data']
-                score = c.get('score', 0)
-                body = c.get('body', '').strip()
-                
-                # ✅ ADAPTIVE: Quality checks
-                if score < min_score:
-                    continue
-                
-                # 🆕 Relaxed mode: Accept shorter comments
-                min_length = 5 if relaxed else 10
-                if len(body) < min_length:
-                    continue
-                
-                if body in ['[deleted]', '[removed]']:
-                    continue
-                
-                # ✅ Relevance check with adaptive mode
-                combined_text = f"{post_title} {body}"
-                if query and not self._is_relevant(combined_text, query, relaxed=relaxed):
-                    continue
-                
-                lightweight_comments.append({
-                    'id': c['id'],
-                    'text': body,
-                    'score': score,
-                    'post_title': post_title
-                })
-                
-                # Process replies (deeper in relaxed mode)
-                max_depth = 4 if relaxed else 3
-                if depth < max_depth:
-                    replies = c.get('replies', {})
-                    if isinstance(replies, dict) and 'data' in replies:
-                        extract_comments(replies['data'].get('children', []), depth + 1)
-        
-        extract_comments(comments_data)
+        # Depth-first walk with an explicit stack of (children iterator, depth), visiting
+        # comments in the same pre-order as a recursive walk would
+        stack = [(iter(comments_data), 0)]
+        while stack:
+            children, depth = stack[-1]
+            comment = next(children, None)
+            if comment is None:
+                stack.pop()
+                continue
+            
+            if comment.get('kind') != 't1':
+                continue
+            
+            c = comment['data']
+            score = c.get('score', 0)
+            
+            # ✅ ADAPTIVE: Quality checks
+            if score < min_score:
+                continue
+            
+            # Raw length first: strip() can only shorten, so short bodies are rejected without a copy
+            body = c.get('body', '')
+            if len(body) < min_length:
+                continue
+            body = body.strip()
+            if len(body) < min_length or body in _REMOVED_BODIES:
+                continue
+            
+            # ✅ Relevance check with adaptive mode
+            if query and not is_relevant(f"{post_title} {body}"):
+                continue
+            
+            append({
+                'id': c['id'],
+                'text': body,
+                'score': score,
+                'post_id': post_id
+            })
+            
+            # Process replies (deeper in relaxed mode)
+            if depth < max_depth:
+                replies = c.get('replies')
+                if isinstance(replies, dict) and 'data' in replies:
+                    stack.append((iter(replies['data'].get('children', [])), depth + 1))
         
         return lightweight_comments
+    
     def fetch_mass_comments(
         self,
         query: str,
         target_comments: int = 10000,
         min_score: int = 5,
-        progress_callback=None
+        progress_callback=None,
+        concurrency: Optional[int] = None,
+        subreddits: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Ultra-fast mass fetch optimized for 4 accounts.
@@ -312,6 +987,10 @@ class MultiAccountRedditFetcher:
         1) Fetch posts in strict mode to measure engagement.
         2) Decide if query is low-engagement using post statistics.
         3) Use that decision (relaxed=True/False) when fetching comments.
+        
+        concurrency: number of parallel comment-fetch workers
+        (default: MAX_IN_FLIGHT_PER_ACCOUNT per account, capped at MAX_COMMENT_WORKERS)
+        subreddits: restrict the post search to these subreddits (default: all of Reddit)
         """
         print(f"\n{'='*60}")
         print(f"🚀 ULTRA-FAST MODE (4 Accounts)")
@@ -319,63 +998,58 @@ class MultiAccountRedditFetcher:
         print(f"   Min Score: {min_score}")
         print(f"{'='*60}\n")
 
-        start_time = time.time()
-        all_comments = {}
+        start_time = time.monotonic()
+        # Comments in arrival order, deduplicated by id
+        all_comments = []
+        seen_ids = set()
 
         # ===== PHASE 1: Parallel Post Fetching (initial, STRICT) =====
         if progress_callback:
             progress_callback(0, 100, 'Fetching posts')
 
-        strategies = [
-            {'sort': 'top', 't': 'month'},
-            {'sort': 'top', 't': 'year'},
-            {'sort': 'relevance', 't': 'all'},
-            {'sort': 'comments', 't': 'month'},
-            {'sort': 'top', 't': 'week'},
-            {'sort': 'hot', 't': 'month'},
-            {'sort': 'top', 't': 'all'},
-            {'sort': 'hot', 't': 'week'},
-            {'sort': 'relevance', 't': 'month'},
-            {'sort': 'top', 't': 'day'},
-            {'sort': 'hot', 't': 'day'},
-            {'sort': 'comments', 't': 'week'}
-        ]
+        self._prewarm_tokens()
 
+        # Posts deduplicated by id as strategies complete (strategies overlap heavily)
         all_posts = []
+        seen_post_ids = set()
         max_workers = min(len(self.accounts) * 3, 12)
 
+        # Every strategy searches the same query, so encode it once
+        query_encoded = quote_plus(query.strip())
+
         print(f"Phase 1: Fetching posts ({max_workers} workers) -- initial strict sampling...")
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        with self._worker_pool(max_workers) as executor:
             future_to_strategy = {}
-            for idx, strategy in enumerate(strategies):
-                account_idx = idx % len(self.accounts)
+            # Strategies assigned to accounts round-robin
+            for (sort, time_filter), account_idx in zip(SEARCH_STRATEGIES, cycle(range(len(self.accounts)))):
                 # ALWAYS fetch posts in strict mode for a representative sample
                 future = executor.submit(
                     self.fetch_posts_batch,
                     query=query,
                     limit=100,
-                    sort=strategy['sort'],
-                    time_filter=strategy['t'],
+                    sort=sort,
+                    time_filter=time_filter,
                     account_idx=account_idx,
-                    relaxed=False
+                    relaxed=False,
+                    query_encoded=query_encoded,
+                    subreddits=subreddits
                 )
-                future_to_strategy[future] = (strategy, account_idx)
+                future_to_strategy[future] = (f"{sort}/{time_filter}", account_idx)
 
             for future in as_completed(future_to_strategy.keys()):
-                strategy, acc_idx = future_to_strategy[future]
+                strategy_name, acc_idx = future_to_strategy[future]
                 try:
                     posts = future.result()
-                    all_posts.extend(posts)
-                    print(f"  ✓ {strategy['sort']}/{strategy['t']} (Acc {acc_idx + 1}): {len(posts)} posts")
-                except Exception as e:
-                    print(f"  ✗ {strategy['sort']}/{strategy['t']} failed: {e}")
-
-        # Deduplicate and sort by engagement
-        unique_posts = {p['data']['id']: p for p in all_posts}
-        all_posts = list(unique_posts.values())
-        all_posts.sort(key=lambda p: p['data'].get('num_comments', 0), reverse=True)
+                    for post in posts:
+                        post_id = post['data']['id']
+                        if post_id not in seen_post_ids:
+                            seen_post_ids.add(post_id)
+                            all_posts.append(post)
+                    print(f"  ✓ {strategy_name} (Acc {acc_idx + 1}): {len(posts)} posts")
+                except FETCH_ERRORS as e:
+                    print(f"  ✗ {strategy_name} failed: {e}")
 
-        phase1_time = time.time() - start_time
+        phase1_time = time.monotonic() - start_time
         print(f"✓ Phase 1: {len(all_posts)} posts in {phase1_time:.1f}s\n")
 
         # ===== Decide adaptive mode based on post engagement statistics =====
@@ -419,88 +1093,113 @@ class MultiAccountRedditFetcher:
 
         comments_per_post = 30
         estimated_posts = (target_comments // comments_per_post) + 100
-        posts_to_process = all_posts[:min(estimated_posts, len(all_posts))]
+        # Strict mode: near-empty threads aren't worth a request (relaxed mode keeps them,
+        # they are all a quiet topic has). Filtered before selection so the heap only ranks
+        # posts that can be fetched.
+        candidates = all_posts
+        if not is_low_engagement:
+            candidates = [p for p in all_posts if p['data'].get('num_comments', 0) >= MIN_POST_COMMENTS]
+            if len(candidates) < len(all_posts):
+                print(f"  Skipping {len(all_posts) - len(candidates)} posts with < {MIN_POST_COMMENTS} comments")
+
+        # Most-commented posts first
+        posts_to_process = heapq.nlargest(
+            estimated_posts, candidates, key=lambda p: p['data'].get('num_comments', 0)
+        )
 
         print(f"Phase 2: Processing {len(posts_to_process)} posts...")
-        max_workers = min(len(self.accounts) * 4, 16)
+        max_workers = concurrency or self._default_comment_workers()
+        self._ensure_pool_size(max_workers)
         print(f"  Using {max_workers} parallel workers\n")
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Set once the target is reached: in-flight fetches then skip their remaining work
+        stop = threading.Event()
+
+        with self._worker_pool(max_workers) as executor:
             future_to_info = {}
             for idx, post in enumerate(posts_to_process):
-                account_idx = idx % len(self.accounts)
                 permalink = post['data']['permalink']
+                # Account chosen when the request runs, by remaining quota (not round-robin)
                 future = executor.submit(
                     self.fetch_comments_lightweight,
                     permalink=permalink,
                     limit=100,
                     min_score=min_score,
-                    account_idx=account_idx,
+                    account_idx=None,
                     query=query,
-                    relaxed=is_low_engagement
+                    relaxed=is_low_engagement,
+                    stop=stop
                 )
-                future_to_info[future] = (idx, account_idx)
+                future_to_info[future] = (idx, permalink)
 
             completed = 0
-            last_log = time.time()
+            last_log = time.monotonic()
 
             for future in as_completed(future_to_info.keys()):
-                idx, acc_idx = future_to_info[future]
+                idx, permalink = future_to_info[future]
                 try:
                     comments = future.result()
-                    for comment in comments:
-                        if comment['id'] not in all_comments:
-                            all_comments[comment['id']] = comment
+                    # Merge the post's comments in bulk (ids are unique within one comment tree)
+                    fresh = [c for c in comments if c['id'] not in seen_ids]
+                    seen_ids.update(c['id'] for c in fresh)
+                    all_comments.extend(fresh)
                     completed += 1
                     # Log every ~2 seconds
-                    if time.time() - last_log >= 2:
+                    if time.monotonic() - last_log >= 2:
                         current = len(all_comments)
                         progress = min(20 + int((current / target_comments) * 70), 90)
                         if progress_callback:
                             progress_callback(progress, 100, f'Comments: {current:,}/{target_comments:,}')
                         print(f"  Progress: {current:,} comments ({completed}/{len(posts_to_process)} posts)")
-                        last_log = time.time()
-                    # Stop when target reached
+                        last_log = time.monotonic()
+                    # Stop when target reached; drop queued fetches so they don't spend quota
                     if len(all_comments) >= target_comments:
+                        stop.set()
+                        for pending in future_to_info:
+                            pending.cancel()
                         break
-                except Exception as e:
-                    print(f"  ⚠️ Error fetching comments (Acc {acc_idx + 1}): {e}")
+                except FETCH_ERRORS as e:
+                    print(f"  ⚠️ Error fetching comments for {permalink}: {e}")
 
         # ===== FINALIZE =====
-        final_comments = list(all_comments.values())
-        final_comments.sort(key=lambda c: c['score'], reverse=True)
-        final_comments = final_comments[:target_comments]
+        final_comments = heapq.nlargest(target_comments, all_comments, key=itemgetter('score'))
 
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         if progress_callback:
             progress_callback(100, 100, 'Complete')
 
-        scores = [c['score'] for c in final_comments] if final_comments else []
-        unique_posts_set = set(c['post_title'] for c in final_comments) if final_comments else set()
+        # One pass for the sum; final_comments is sorted by score, so min/max are its ends
+        score_total = sum(map(itemgetter('score'), final_comments))
+        max_score_value = final_comments[0]['score'] if final_comments else 0
+        min_score_value = final_comments[-1]['score'] if final_comments else 0
+        # Side table of post titles, referenced by each comment's post_id
+        post_titles = {p['data']['id']: p['data'].get('title', '') for p in posts_to_process}
+        posts = {c['post_id']: post_titles.get(c['post_id'], '') for c in final_comments}
 
         print(f"\n{'='*60}")
         print(f"✅ FETCH COMPLETE")
         print(f"   Comments: {len(final_comments):,}")
-        print(f"   Posts: {len(unique_posts_set):,}")
+        print(f"   Posts: {len(posts):,}")
         print(f"   Time: {elapsed:.1f}s ({elapsed/60:.1f} min)")
         print(f"   Speed: {len(final_comments)/elapsed:.1f} comments/sec")
         print(f"{'='*60}\n")
 
         return {
             'comments': final_comments,
+            'posts': posts,
             'metadata': {
                 'query': query,
                 'totalComments': len(final_comments),
-                'totalPosts': len(unique_posts_set),
+                'totalPosts': len(posts),
                 'targetComments': target_comments,
                 'minScore': min_score,
-                'averageScore': round(sum(scores) / len(scores)) if scores else 0,
-                'minScoreValue': min(scores) if scores else 0,
-                'maxScoreValue': max(scores) if scores else 0,
+                'averageScore': round(score_total / len(final_comments)) if final_comments else 0,
+                'minScoreValue': min_score_value,
+                'maxScoreValue': max_score_value,
                 'fetchTime': round(elapsed, 2),
                 'commentsPerSecond': round(len(final_comments) / elapsed, 2) if elapsed > 0 else 0,
                 'accountsUsed': len(self.accounts),
-                'fetchedAt': datetime.utcnow().isoformat(),
+                'fetchedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
                 'source': 'Reddit API (4-Account Ultra-Fast)',
                 'relevanceFiltering': True,
                 'adaptiveMode': adaptive_mode,
@@ -511,7 +1210,6 @@ class MultiAccountRedditFetcher:
 
 # Quick test
 if __name__ == "__main__":
-    import json
     from dotenv import load_dotenv
     
     load_dotenv()
@@ -525,8 +1223,7 @@ if __name__ == "__main__":
     )
     
     filename = f"reddit_4acc_{int(time.time())}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    write_json(filename, result, stream_key='comments')
     
     print(f"✅ Saved to {filename}")
     print(f"   Size: {os.path.getsize(filename) / 1024:.1f} KB")
\ No newline at end of file
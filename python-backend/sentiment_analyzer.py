@@ -4,15 +4,20 @@ Fixed Reddit Comment Sentiment Analysis with GPU Acceleration
 Optimized for speed and accuracy with universal GPU detection
 """
 
-import json
+import heapq
+import logging
 import os
 from datetime import datetime
 from transformers import pipeline
 import torch
 import warnings
 from collections import Counter
+from operator import itemgetter
+from json_utils import read_json, write_json
 warnings.filterwarnings("ignore")
 
+logger = logging.getLogger(__name__)
+
 # ==============================================================
 # 🌍 UNIVERSAL GPU AUTO-DETECTION (CUDA / MPS / DirectML / CPU)
 # ==============================================================
@@ -21,12 +26,12 @@ def get_best_device():
     try:
         # 1️⃣ CUDA (NVIDIA)
         if torch.cuda.is_available():
-            print("✅ Using NVIDIA GPU (CUDA)")
+            logger.info("✅ Using NVIDIA GPU (CUDA)")
             return "cuda", "NVIDIA CUDA"
 
         # 2️⃣ Apple Silicon (MPS)
         if hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-            print("✅ Using Apple GPU (MPS)")
+            logger.info("✅ Using Apple GPU (MPS)")
             return "mps", "Apple MPS"
 
         # 3️⃣ DirectML (Intel / AMD / fallback)
@@ -34,17 +39,17 @@ def get_best_device():
             import onnxruntime as ort
             providers = ort.get_available_providers()
             if "DmlExecutionProvider" in providers:
-                print("✅ Using GPU via ONNX Runtime DirectML")
+                logger.info("✅ Using GPU via ONNX Runtime DirectML")
                 return "onnxruntime", "DirectML"
         except Exception:
             pass
 
         # 4️⃣ CPU fallback
-        print("⚙️ Using CPU (no GPU found)")
+        logger.info("⚙️ Using CPU (no GPU found)")
         return "cpu", "CPU"
 
     except Exception as e:
-        print(f"⚠️ Error detecting GPU: {e}")
+        logger.warning(f"⚠️ Error detecting GPU: {e}")
         return "cpu", "CPU"
 
 # Get and print the best available device
@@ -60,14 +65,15 @@ TRUNCATE_LENGTH = 512
 class RedditSentimentAnalyzer:
     def __init__(self):
         """Initialize the sentiment analyzer with GPU-accelerated models"""
-        print("🤖 Loading Hugging Face models with GPU acceleration...")
-        print(f"🔧 Device: {DEVICE_NAME} (device={DEVICE})")
-        print(f"📦 Batch size: {MAX_BATCH_SIZE}")
+        logger.info("🤖 Loading Hugging Face models with GPU acceleration...")
+        logger.info(f"🔧 Device: {DEVICE_NAME} (device={DEVICE})")
+        logger.info(f"📦 Batch size: {MAX_BATCH_SIZE}")
         
         # Primary sentiment model (Cardiff NLP - fast and accurate)
         self.sentiment_analyzer = pipeline(
             "sentiment-analysis",
             model="cardiffnlp/twitter-roberta-base-sentiment-latest",
+            use_fast=True,
             device=0 if DEVICE in ["cuda", "mps"] else -1,
             batch_size=MAX_BATCH_SIZE
         )
@@ -77,15 +83,22 @@ class RedditSentimentAnalyzer:
             self.emotion_analyzer = pipeline(
                 "text-classification",
                 model="j-hartmann/emotion-english-distilroberta-base",
+                use_fast=True,
                 device=0 if DEVICE in ["cuda", "mps"] else -1,
                 batch_size=MAX_BATCH_SIZE
             )
             self.has_emotion = True
         except Exception as e:
-            print(f"⚠️ Emotion analyzer not available: {e}")
+            logger.warning(f"⚠️ Emotion analyzer not available: {e}")
             self.has_emotion = False
         
-        print("✅ Models loaded successfully!")
+        # Inference only: switch off dropout and autograd tracking once
+        analyzers = [self.sentiment_analyzer] + ([self.emotion_analyzer] if self.has_emotion else [])
+        for analyzer in analyzers:
+            analyzer.model.eval()
+            analyzer.model.requires_grad_(False)
+        
+        logger.info("✅ Models loaded successfully!")
 
     def _map_sentiment_label(self, label, score):
         """
@@ -101,15 +114,20 @@ class RedditSentimentAnalyzer:
         else:
             return 'neutral', 0.0
 
-    def analyze_comments_batch(self, comments_data):
-        """Analyze multiple comments in batches for maximum GPU efficiency"""
-        print(f"🚀 Starting batch sentiment analysis...")
+    def analyze_comments_batch(self, comments_data, posts=None):
+        """
+        Analyze multiple comments in batches for maximum GPU efficiency.
+        `posts` maps post_id -> title for comments that reference their post by id.
+        """
+        logger.debug(f"🚀 Starting batch sentiment analysis...")
+        posts = posts or {}
         
         texts, metadata = [], []
         for i, comment in enumerate(comments_data):
             text = comment.get('text', comment.get('body', '')) if isinstance(comment, dict) else str(comment)
             score = comment.get('score', 0) if isinstance(comment, dict) else 0
-            post_title = comment.get('post_title', '') if isinstance(comment, dict) else ''
+            # Fetcher output references posts by post_id; older files carry post_title inline
+            post_title = (comment.get('post_title') or posts.get(comment.get('post_id'), '')) if isinstance(comment, dict) else ''
             comment_id = comment.get('id', f'comment_{i}') if isinstance(comment, dict) else f'comment_{i}'
             
             if text and len(text.strip()) >= 10:
@@ -122,23 +140,25 @@ class RedditSentimentAnalyzer:
                 })
         
         if not texts:
-            print("⚠️ No valid texts to analyze")
+            logger.warning("⚠️ No valid texts to analyze")
             return []
         
-        print(f"📊 Processing {len(texts)} comments in batches of {MAX_BATCH_SIZE}")
+        logger.debug(f"📊 Processing {len(texts)} comments in batches of {MAX_BATCH_SIZE}")
         analyzed_comments = []
         
         try:
-            print("🎭 Running sentiment analysis...")
-            sentiment_results = self.sentiment_analyzer(texts)
+            logger.debug("🎭 Running sentiment analysis...")
+            with torch.inference_mode():
+                sentiment_results = self.sentiment_analyzer(texts)
             
             emotion_results = None
             if self.has_emotion:
                 try:
-                    print("😊 Running emotion analysis...")
-                    emotion_results = self.emotion_analyzer(texts)
+                    logger.debug("😊 Running emotion analysis...")
+                    with torch.inference_mode():
+                        emotion_results = self.emotion_analyzer(texts)
                 except Exception as e:
-                    print(f"⚠️ Emotion analysis failed: {e}")
+                    logger.warning(f"⚠️ Emotion analysis failed: {e}")
             
             for i, (sentiment_result, meta) in enumerate(zip(sentiment_results, metadata)):
                 label = sentiment_result['label']
@@ -164,41 +184,40 @@ class RedditSentimentAnalyzer:
                 
                 analyzed_comments.append(result)
             
-            print(f"✅ Batch analysis complete! Processed {len(analyzed_comments)} comments")
+            logger.debug(f"✅ Batch analysis complete! Processed {len(analyzed_comments)} comments")
             return analyzed_comments
             
         except Exception as e:
             import traceback
-            print(f"🚨 Error in batch analysis: {str(e)}")
-            print(traceback.format_exc())
+            logger.error(f"🚨 Error in batch analysis: {str(e)}")
+            logger.error(traceback.format_exc())
             return []
 
     def analyze_json_file(self, file_path):
         """Analyze all comments in a JSON file"""
-        print(f"\n{'='*60}")
-        print(f"📊 Analyzing: {os.path.basename(file_path)}")
-        print(f"{'='*60}")
+        logger.info(f"\n{'='*60}")
+        logger.info(f"📊 Analyzing: {os.path.basename(file_path)}")
+        logger.info(f"{'='*60}")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json(file_path)
             
             if 'comments' in data:
                 comments = data['comments']
             elif 'postsWithComments' in data:
                 comments = [c for post in data['postsWithComments'] for c in post.get('comments', [])]
             else:
-                print("❌ Unknown JSON structure - expected 'comments' or 'postsWithComments' key")
+                logger.error("❌ Unknown JSON structure - expected 'comments' or 'postsWithComments' key")
                 return None
                 
-            print(f"📝 Found {len(comments)} total comments")
+            logger.info(f"📝 Found {len(comments)} total comments")
             if not comments:
-                print("⚠️ No comments to analyze")
+                logger.warning("⚠️ No comments to analyze")
                 return None
             
-            analyzed_comments = self.analyze_comments_batch(comments)
+            analyzed_comments = self.analyze_comments_batch(comments, data.get('posts'))
             if not analyzed_comments:
-                print("❌ No comments were successfully analyzed")
+                logger.error("❌ No comments were successfully analyzed")
                 return None
             
             total_analyzed = len(analyzed_comments)
@@ -215,19 +234,19 @@ class RedditSentimentAnalyzer:
                 emotion_counts = Counter(c['emotion']['primary'] for c in analyzed_comments if 'emotion' in c)
                 emotion_percentages = {k: (v/total_analyzed)*100 for k, v in emotion_counts.items()}
             
-            top_positive = sorted(
-                [c for c in analyzed_comments if c['sentiment'] == 'positive'], 
-                key=lambda x: x['confidence'], 
-                reverse=True
-            )[:10]
+            top_positive = heapq.nlargest(
+                10,
+                (c for c in analyzed_comments if c['sentiment'] == 'positive'),
+                key=itemgetter('confidence')
+            )
             
-            top_negative = sorted(
-                [c for c in analyzed_comments if c['sentiment'] == 'negative'], 
-                key=lambda x: x['confidence'], 
-                reverse=True
-            )[:10]
+            top_negative = heapq.nlargest(
+                10,
+                (c for c in analyzed_comments if c['sentiment'] == 'negative'),
+                key=itemgetter('confidence')
+            )
             
-            high_scoring = sorted(analyzed_comments, key=lambda x: x['score'], reverse=True)[:10]
+            high_scoring = heapq.nlargest(10, analyzed_comments, key=itemgetter('score'))
             
             dominant_sentiment = max(sentiment_percentages, key=sentiment_percentages.get)
             sentiment_confidence = sentiment_percentages[dominant_sentiment]
@@ -258,74 +277,74 @@ class RedditSentimentAnalyzer:
                     'dominant_emotion': max(emotion_percentages, key=emotion_percentages.get)
                 }
             
-            print(f"\n{'='*60}")
-            print(f"✅ Analysis Complete!")
-            print(f"{'='*60}")
-            print(f"📊 Comments analyzed: {total_analyzed}/{len(comments)}")
-            print(f"🎭 Overall sentiment: {dominant_sentiment.upper()} ({sentiment_confidence:.1f}%)")
-            print(f"\n📈 Breakdown:")
-            print(f"   Positive: {sentiment_counts.get('positive', 0):,} ({sentiment_percentages['positive']:.1f}%)")
-            print(f"   Negative: {sentiment_counts.get('negative', 0):,} ({sentiment_percentages['negative']:.1f}%)")
-            print(f"   Neutral:  {sentiment_counts.get('neutral', 0):,} ({sentiment_percentages['neutral']:.1f}%)")
+            logger.info(f"\n{'='*60}")
+            logger.info(f"✅ Analysis Complete!")
+            logger.info(f"{'='*60}")
+            logger.info(f"📊 Comments analyzed: {total_analyzed}/{len(comments)}")
+            logger.info(f"🎭 Overall sentiment: {dominant_sentiment.upper()} ({sentiment_confidence:.1f}%)")
+            logger.info(f"\n📈 Breakdown:")
+            logger.info(f"   Positive: {sentiment_counts.get('positive', 0):,} ({sentiment_percentages['positive']:.1f}%)")
+            logger.info(f"   Negative: {sentiment_counts.get('negative', 0):,} ({sentiment_percentages['negative']:.1f}%)")
+            logger.info(f"   Neutral:  {sentiment_counts.get('neutral', 0):,} ({sentiment_percentages['neutral']:.1f}%)")
             
             if emotion_counts:
                 dominant_emotion = max(emotion_percentages, key=emotion_percentages.get)
-                print(f"\n😊 Dominant emotion: {dominant_emotion} ({emotion_percentages[dominant_emotion]:.1f}%)")
+                logger.info(f"\n😊 Dominant emotion: {dominant_emotion} ({emotion_percentages[dominant_emotion]:.1f}%)")
             
-            print(f"{'='*60}\n")
+            logger.info(f"{'='*60}\n")
             return analysis_result
             
         except Exception as e:
             import traceback
-            print(f"\n🚨 FATAL ERROR:")
-            print(f"{'='*60}")
-            print(traceback.format_exc())
-            print(f"{'='*60}\n")
+            logger.error(f"\n🚨 FATAL ERROR:")
+            logger.info(f"{'='*60}")
+            logger.error(traceback.format_exc())
+            logger.info(f"{'='*60}\n")
             return None
 
     def analyze_all_files(self, directory_path="pre-process"):
         """Analyze all JSON files in the directory"""
-        print(f"\n{'='*60}")
-        print(f"🔍 Scanning directory: {directory_path}")
-        print(f"{'='*60}\n")
+        logger.info(f"\n{'='*60}")
+        logger.info(f"🔍 Scanning directory: {directory_path}")
+        logger.info(f"{'='*60}\n")
         
         if not os.path.exists(directory_path):
-            print(f"❌ Directory not found: {directory_path}")
+            logger.error(f"❌ Directory not found: {directory_path}")
             return {}
         
         json_files = [f for f in os.listdir(directory_path) 
                      if f.endswith('.json') and not f.startswith('analysis_') 
                      and not f.startswith('sentiment_')]
         
-        print(f"📁 Found {len(json_files)} JSON files to analyze\n")
+        logger.info(f"📁 Found {len(json_files)} JSON files to analyze\n")
         
         all_analyses = {}
         
         for idx, json_file in enumerate(json_files, 1):
-            print(f"\n[{idx}/{len(json_files)}] Processing: {json_file}")
+            logger.info(f"\n[{idx}/{len(json_files)}] Processing: {json_file}")
             file_path = os.path.join(directory_path, json_file)
             analysis = self.analyze_json_file(file_path)
             
             if analysis:
                 all_analyses[json_file] = analysis
                 output_file = os.path.join(directory_path, f"sentiment_{json_file}")
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(analysis, f, indent=2, ensure_ascii=False)
-                print(f"💾 Saved to: {output_file}")
+                write_json(output_file, analysis, stream_key='all_comments')
+                logger.info(f"💾 Saved to: {output_file}")
             else:
-                print(f"❌ Failed to analyze {json_file}")
+                logger.error(f"❌ Failed to analyze {json_file}")
         
         if all_analyses:
             combined_output = os.path.join(directory_path, "combined_sentiment_analysis.json")
-            with open(combined_output, 'w', encoding='utf-8') as f:
-                json.dump(all_analyses, f, indent=2, ensure_ascii=False)
-            print(f"\n🎉 Combined results saved to: {combined_output}")
+            write_json(combined_output, all_analyses)
+            logger.info(f"\n🎉 Combined results saved to: {combined_output}")
         
         return all_analyses
 
 
 def main():
     """Main function to run sentiment analysis"""
+    logging.basicConfig(level=os.getenv("REVUAI_LOG", "INFO").upper(), format="%(message)s")
+    
     print("\n" + "="*60)
     print("🚀 Reddit Sentiment Analysis with Hugging Face")
     print("="*60 + "\n")
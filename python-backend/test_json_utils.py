@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the atomic JSON writer
+Run with: python -m unittest test_json_utils
+"""
+
+import os
+import stat
+import tempfile
+import threading
+import unittest
+
+from json_utils import DEFAULT_FILE_MODE, read_json, write_json
+
+
+class WriteJsonTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.dir = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_concurrent_writers_of_one_path_never_corrupt_it(self):
+        for name in ('out.json', 'out.json.gz'):
+            path = os.path.join(self.dir, name)
+            errors = []
+
+            def writer(n):
+                try:
+                    for _ in range(20):
+                        write_json(path, {'writer': n, 'comments': [{'id': i} for i in range(2000)]},
+                                   stream_key='comments')
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(len(read_json(path)['comments']), 2000)
+        # No temp files left behind
+        self.assertEqual(sorted(os.listdir(self.dir)), ['out.json', 'out.json.gz'])
+
+    def test_mode(self):
+        path = os.path.join(self.dir, 'tokens.json')
+        write_json(path, {}, mode=0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        path = os.path.join(self.dir, 'plain.json')
+        write_json(path, {})
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), DEFAULT_FILE_MODE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the Reddit fetcher's worker scheduling (no network: the HTTP-level methods are replaced)
+Run with: python -m unittest test_reddit_fetcher
+"""
+
+import os
+import threading
+import unittest
+
+os.environ.setdefault('REVUAI_TOKEN_CACHE', '')
+
+from reddit_fetcher import MultiAccountRedditFetcher, RateController
+
+ACCOUNTS = [
+    {'client_id': f'id{i}', 'client_secret': 'secret', 'username': f'user{i}', 'password': 'password'}
+    for i in range(2)
+]
+
+
+def make_posts(n):
+    return [
+        {'data': {'id': f'p{i}', 'title': f'post {i}', 'num_comments': 100, 'permalink': f'/r/test/comments/p{i}/t/'}}
+        for i in range(n)
+    ]
+
+
+class ConcurrencyTest(unittest.TestCase):
+
+    def test_concurrency_caps_comment_fetches_in_flight(self):
+        fetcher = MultiAccountRedditFetcher(ACCOUNTS)
+        posts = make_posts(20)
+        fetched = []
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def fetch_comments(permalink, **kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            threading.Event().wait(0.02)
+            with lock:
+                in_flight -= 1
+                fetched.append(permalink)
+            return []
+
+        fetcher._prewarm_tokens = lambda: None
+        fetcher.fetch_posts_batch = lambda **kwargs: posts
+        fetcher.fetch_comments_lightweight = fetch_comments
+
+        fetcher.fetch_mass_comments('test', target_comments=1000, concurrency=2)
+
+        # Narrower than the shared executor, yet every post is still fetched
+        self.assertLess(2, fetcher._workers)
+        self.assertLessEqual(peak, 2)
+        self.assertEqual(len(fetched), len(posts))
+
+    def test_stopped_request_waiting_for_a_slot_is_never_sent(self):
+        fetcher = MultiAccountRedditFetcher(ACCOUNTS[:1])
+        fetcher.token_slots[0].set('token', 3600)
+        sent = []
+        fetcher.session.get = lambda url, **kwargs: sent.append(url)
+        controller = fetcher.rate_controllers[0]
+        controller.limit = 1
+        stop = threading.Event()
+        results = []
+
+        with controller.admit():
+            # The only slot is taken, so this request queues in admit()
+            worker = threading.Thread(target=lambda: results.append(
+                fetcher._api_get('https://oauth.reddit.com/r/test.json', 0, stop=stop)))
+            worker.start()
+            threading.Event().wait(0.05)
+            tokens = controller.bucket.available()
+            stop.set()
+            worker.join()
+
+        self.assertEqual(results, [None])
+        self.assertEqual(sent, [])
+        self.assertGreaterEqual(controller.bucket.available(), tokens)
+
+
+class RateControllerTest(unittest.TestCase):
+
+    def test_admit_takes_no_bucket_token_while_paused(self):
+        controller = RateController()
+        controller._pause(0.3)
+        admitted = threading.Event()
+
+        def request():
+            with controller.admit():
+                admitted.set()
+
+        worker = threading.Thread(target=request)
+        worker.start()
+        self.assertFalse(admitted.wait(0.1))
+        # Still paused: the waiting request holds neither a slot nor a token
+        self.assertEqual(controller.in_flight, 0)
+        self.assertEqual(controller.bucket.available(), controller.bucket.capacity)
+        worker.join()
+        self.assertTrue(admitted.is_set())
+
+
+if __name__ == '__main__':
+    unittest.main()
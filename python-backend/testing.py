@@ -95,32 +95,7 @@ print("   • Automatically switches based on query engagement")
 print("="*70)
 
 
-"""
-Test script to demonstrate relevance filtering
-Shows examples of what gets kept vs filtered out
-"""
-
-def is_relevant(text: str, query: str) -> bool:
-    """Same logic as in the fetcher"""
-    if not text or not query:
-        return False
-    
-    text_lower = text.lower()
-    query_lower = query.lower()
-    
-    query_terms = query_lower.split()
-    
-    # For single word: direct match
-    if len(query_terms) == 1:
-        return query_lower in text_lower
-    
-    # For multi-word: check if full phrase OR all terms present
-    if query_lower in text_lower:
-        return True
-    
-    return all(term in text_lower for term in query_terms)
-
-
+# Strict-mode examples (the default is_relevant above, relaxed=False)
 # Test cases
 print("="*60)
 print("🧪 RELEVANCE FILTERING TEST")